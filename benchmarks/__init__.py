@@ -0,0 +1 @@
+"""Synthetic uploads and per-stage timings for every platform adapter; run with ``python -m benchmarks``."""
@@ -0,0 +1,77 @@
+"""``python -m benchmarks``: time every adapter on generated uploads and write the results as JSON.
+
+    python -m benchmarks --sizes 10000 100000 -o bench.json
+    python -m benchmarks --sizes 10000 100000 --baseline bench.json   # exits 1 on a regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from gstify.adapters import ADAPTERS
+
+from .generators import XLSX_MAX_ROWS
+from .suite import compare, run_case
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000], help="rows per generated file (default: %(default)s)")
+    parser.add_argument("--platforms", nargs="+", choices=list(ADAPTERS), default=list(ADAPTERS), metavar="PLATFORM",
+                        help="platform keys to run (default: all)")
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv",
+                        help="upload and export format (Flipkart is always read from a workbook)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the fastest counts")
+    parser.add_argument("--data-dir", default=None, help="keep generated uploads here (default: a temporary directory)")
+    parser.add_argument("-o", "--out", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (default: 25%%)")
+    return parser
+
+def _meta(args):
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "format": args.format, "repeat": args.repeat,
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "machine": platform.machine(), "cpus": os.cpu_count(),
+    }
+
+def run(args, data_dir):
+    results = []
+    for rows in args.sizes:
+        for key in args.platforms:
+            fmt = "xlsx" if key == "flipkart" else args.format
+            if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+                print(f"skip {key} x {rows}: more rows than an Excel sheet holds", file=sys.stderr)
+                continue
+            for r in run_case(key, rows, data_dir, args.format, args.seed, args.repeat):
+                print(f"{key:<14} {rows:>9} {r['stage']:<10} {r['seconds']:>9.4f}s  {r['rows_in']:>9} -> {r['rows_out']}")
+                results.append(r)
+    return results
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.data_dir:
+        results = run(args, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="gstify-bench-") as data_dir:
+            results = run(args, data_dir)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"meta": _meta(args), "results": results}, fh, indent=1)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            slower = compare(results, json.load(fh), args.tolerance)
+        for (key, rows, fmt, stage), before, after in slower:
+            print(f"REGRESSION {key} x {rows} ({fmt}) {stage}: {before:.4f}s -> {after:.4f}s", file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
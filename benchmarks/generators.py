@@ -0,0 +1,203 @@
+"""Seeded synthetic uploads in every format the adapters accept.
+
+Values are shaped like real exports: state names in assorted spellings (a few unmappable), GST components as
+fractions for Amazon and percentages elsewhere, HSN codes that sometimes carry a trailing ``.0``, invoice dates
+in several text layouts. The same ``seed`` and ``rows`` always give the same frame.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from gstify.constants import STATE_NAME_MAPPING
+
+# Excel sheets stop at 1,048,576 rows including the header.
+XLSX_MAX_ROWS = 1_048_575
+
+STATE_SPELLINGS = sorted(STATE_NAME_MAPPING) + [
+    "madhya pradesh", "MAHARASHTRA", " Delhi ", "Tamil  Nadu", "Orissa", "Unknownland",
+]
+SLABS = np.array([0, 3, 5, 12, 18, 28])
+HSN_CODES = np.array(["6109", "6109.0", "4202", "6204", "9999", "3304", "8517", "6403"])
+
+
+def _states(rng, n):
+    return rng.choice(STATE_SPELLINGS, n)
+
+def _hsn(rng, n):
+    return rng.choice(HSN_CODES, n)
+
+def _taxable(rng, n):
+    tv = np.round(rng.lognormal(6, 1, n), 2)
+    tv[rng.random(n) < 0.02] = 0          # zero-value lines the adapters filter out
+    return tv
+
+def _invoice_numbers(prefix, n):
+    return prefix + pd.Series(np.arange(n)).astype(str)
+
+def _invoice_dates(rng, n):
+    # Days of April 2025 in the layouts the marketplaces export, plus the odd unreadable value.
+    days = pd.Timestamp("2025-04-01") + pd.to_timedelta(rng.integers(0, 30, n), unit="D")
+    layouts = [days.strftime(f).to_numpy(dtype=object) for f in ("%d-%b-%Y", "%Y-%m-%d", "%d %b %Y")]
+    dates = np.choose(rng.integers(0, len(layouts), n), layouts)
+    dates[rng.random(n) < 0.001] = "n/a"
+    return dates
+
+def _split(rng, rate):
+    """Rate (percent) as IGST or CGST+SGST halves, chosen per row."""
+    inter = rng.random(len(rate)) < 0.6
+    return np.where(inter, rate, 0.0), np.where(inter, 0.0, rate / 2)
+
+def amazon(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows).astype(float)
+    igst, half = _split(rng, rate)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "Ship To State": _states(rng, rows),
+        "Tax Exclusive Gross": tv,
+        "Cgst Rate": half / 100, "Sgst Rate": half / 100, "Igst Rate": igst / 100,
+        "Hsn/sac": _hsn(rng, rows),
+        "Quantity": rng.integers(1, 5, rows),
+        "Invoice Amount": np.round(tv * (1 + rate / 100), 2),
+        "Order Id": _invoice_numbers("408-", rows),
+    })
+
+def flipkart(rows, seed=0):
+    """The three GSTR-1 sections of a Flipkart workbook, as ``{sheet name: df}``."""
+    rng = np.random.default_rng(seed)
+    small = max(rows // 10, 1)
+    rate = rng.choice(SLABS, small).astype(float)
+    sec_7a = pd.DataFrame({
+        "Aggregate Taxable Value Rs.": _taxable(rng, small), "CGST %": rate / 2, "SGST/UT %": rate / 2,
+    })
+    sec_7b = pd.DataFrame({
+        "Aggregate Taxable Value Rs.": _taxable(rng, rows), "IGST %": rng.choice(SLABS, rows),
+        "Delivered State (PoS)": _states(rng, rows),
+    })
+    tv = _taxable(rng, small)
+    rate = rng.choice(SLABS, small)
+    igst, half = _split(rng, rate.astype(float))
+    sec_12 = pd.DataFrame({
+        "HSN Number": _hsn(rng, small), "Total Quantity in Nos.": rng.integers(1, 50, small),
+        "Total Taxable Value Rs.": tv, "IGST Amount Rs.": np.round(tv * igst / 100, 2),
+        "CGST Amount Rs.": np.round(tv * half / 100, 2), "SGST Amount Rs.": np.round(tv * half / 100, 2),
+    })
+    return {"Section 7(A)(2) in GSTR-1": sec_7a, "Section 7(B)(2) in GSTR-1": sec_7b, "Section 12 in GSTR-1": sec_12}
+
+def jiomart(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows).astype(float)
+    igst, half = _split(rng, rate)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "Customer's Billing State": _states(rng, rows),
+        "IGST Rate": igst, "CGST Rate": half, "SGST Rate (or UTGST as applicable)": half,
+        "Taxable Value (Final Invoice Amount -Taxes)": tv,
+        "HSN Code": _hsn(rng, rows), "Item Quantity": rng.integers(1, 5, rows),
+        "Final Invoice Amount (Offer Price minus Seller Coupon Amount)": np.round(tv * (1 + rate / 100), 2),
+        "IGST Amount": np.round(tv * igst / 100, 2), "CGST Amount": np.round(tv * half / 100, 2),
+        "SGST Amount (Or UTGST as applicable)": np.round(tv * half / 100, 2),
+    })
+
+def meesho(rows, seed=0):
+    """Meesho sales and returns share one layout."""
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "end_customer_state_new": _states(rng, rows), "gst_rate": rate, "total_taxable_sale_value": tv,
+        "hsn_code": _hsn(rng, rows), "quantity": rng.integers(1, 4, rows),
+        "total_invoice_value": np.round(tv * (1 + rate / 100), 2),
+    })
+
+def glowroad(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows).astype(float)
+    igst, half = _split(rng, rate)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "Base amount for GST ": tv, "Buyer state": _states(rng, rows), "GST %": rate,
+        "Product HSN code": rng.choice(["6109.0", "4,202", "9999", "6204"], rows),
+        "SGST": np.round(tv * half / 100, 2), "UTGST": 0.0, "CGST": np.round(tv * half / 100, 2),
+        "IGST": np.round(tv * igst / 100, 2), "Customer invoice value (GMV)": np.round(tv * (1 + rate / 100), 2),
+    })
+
+def b2c_other(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows).astype(float)
+    igst, half = _split(rng, rate)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "Place Of Supply": _states(rng, rows), "Rate": rate, "Taxable Value": tv,
+        "Total Value": np.round(tv * (1 + rate / 100), 2), "HSN": _hsn(rng, rows),
+        "Total Quantity": rng.integers(1, 5, rows), "Integrated Tax Amount": np.round(tv * igst / 100, 2),
+        "Central Tax Amount": np.round(tv * half / 100, 2), "State/UT Tax Amount": np.round(tv * half / 100, 2),
+        "Cess Amount": 0.0,
+    })
+
+def _gstins(rng, n, customers):
+    pool = np.array([f"{rng.integers(1, 38):02d}ABCDE{i:04d}F1Z{i % 10}" for i in range(customers)])
+    return rng.choice(pool, n)
+
+def b2b_template(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "GSTIN/UIN of Recipient": _gstins(rng, rows, max(rows // 50, 1)),
+        "Receiver Name": "Customer " + pd.Series(rng.integers(0, max(rows // 50, 1), rows)).astype(str),
+        "Invoice Number": _invoice_numbers("INV", rows), "Invoice Date": _invoice_dates(rng, rows),
+        "Invoice Value": np.round(tv * (1 + rate / 100), 2), "Place Of Supply": _states(rng, rows),
+        "Total Rate": rate, "Taxable Value": tv, "Cess Amount": 0.0,
+        "HSN": _hsn(rng, rows), "Total Quantity": rng.integers(1, 10, rows),
+    })
+
+def amazon_b2b(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rate = rng.choice(SLABS, rows).astype(float)
+    igst, half = _split(rng, rate)
+    tv = _taxable(rng, rows)
+    return pd.DataFrame({
+        "Customer Bill To Gstid": _gstins(rng, rows, max(rows // 50, 1)),
+        "Buyer Name": "Buyer " + pd.Series(rng.integers(0, max(rows // 50, 1), rows)).astype(str),
+        "Invoice Number": _invoice_numbers("IN-", rows), "Invoice Date": _invoice_dates(rng, rows),
+        "Invoice Amount": np.round(tv * (1 + rate / 100), 2), "Ship To State": _states(rng, rows),
+        "Cgst Rate": half / 100, "Sgst Rate": half / 100, "Utgst Rate": 0.0, "Igst Rate": igst / 100,
+        "Tax Exclusive Gross": tv, "Compensatory Cess Rate": 0.0,
+        "Hsn/sac": _hsn(rng, rows), "Quantity": rng.integers(1, 10, rows),
+    })
+
+# Platform key (as in ``gstify.ADAPTERS``) -> generator.
+GENERATORS = {
+    "amazon": amazon,
+    "flipkart": flipkart,
+    "jiomart": jiomart,
+    "meesho_sales": meesho,
+    "meesho_return": meesho,
+    "glowroad": glowroad,
+    "b2c_other": b2c_other,
+    "b2b_template": b2b_template,
+    "amazon_b2b": amazon_b2b,
+}
+
+def generate(platform, rows, seed=0):
+    return GENERATORS[platform](rows, seed)
+
+def write_upload(platform, rows, out_dir, fmt="csv", seed=0):
+    """Generate and write one upload file; returns its path. Flipkart is always a workbook."""
+    data = generate(platform, rows, seed)
+    if platform == "flipkart":
+        fmt = "xlsx"
+    if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+        raise ValueError(f"{rows} rows do not fit in one Excel sheet (max {XLSX_MAX_ROWS})")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{platform}_{rows}_{seed}.{fmt}")
+    if fmt == "csv":
+        data.to_csv(path, index=False)
+    else:
+        sheets = data if isinstance(data, dict) else {"Sheet1": data}
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+    return path
@@ -0,0 +1,141 @@
+"""Per-stage timings for one platform adapter on one generated upload.
+
+Stages, each timed on its own:
+
+* ``read``      parse the file with the schema's column projection (``read_timed`` / ``read_sheets``)
+* ``normalise`` state names to codes, GST rates rounded to slabs, invoice dates parsed (B2B only)
+* ``tax_split`` IGST/CGST/SGST from taxable value, rate and place of supply (``split_gst``)
+* ``groupby``   State x Rate taxable totals, the shape of the B2CS view
+* ``transform`` the adapter's full transform, i.e. everything above as the app runs it
+* ``merge``     folding the result into a session's ``MergedData`` and building the merged views
+* ``export``    building every report and writing each to bytes in the chosen format
+
+Flipkart's micro-stages run on its Section 7(B)(2) sheet, the only one with a state column.
+"""
+import copy
+import time
+
+from gstify.adapters import ADAPTERS, mapped_state
+from gstify.export import to_bytes
+from gstify.gst import parse_invoice_dates, round_gst_rates, split_gst
+from gstify.readers import read_sheets, read_timed
+from gstify.reports import build_reports, empty_global_data
+from gstify.states import normalise_states
+
+from .generators import write_upload
+
+STAGES = ("read", "normalise", "tax_split", "groupby", "transform", "merge", "export")
+BUSINESS_STATE = "Madhya Pradesh"
+
+
+def _rate_sum(*cols, scale=1):
+    return lambda df: df[list(cols)].sum(axis=1) * scale
+
+# Platform -> (state column, rate in percent, taxable column) for the micro-stages.
+SPECS = {
+    "amazon": ("Ship To State", _rate_sum("Cgst Rate", "Sgst Rate", "Igst Rate", scale=100), "Tax Exclusive Gross"),
+    "flipkart": ("Delivered State (PoS)", _rate_sum("IGST %"), "Aggregate Taxable Value Rs."),
+    "jiomart": ("Customer's Billing State", _rate_sum("IGST Rate", "CGST Rate", "SGST Rate (or UTGST as applicable)"),
+                "Taxable Value (Final Invoice Amount -Taxes)"),
+    "meesho_sales": ("end_customer_state_new", _rate_sum("gst_rate"), "total_taxable_sale_value"),
+    "meesho_return": ("end_customer_state_new", _rate_sum("gst_rate"), "total_taxable_sale_value"),
+    "glowroad": ("Buyer state", _rate_sum("GST %"), "Base amount for GST "),
+    "b2c_other": ("Place Of Supply", _rate_sum("Rate"), "Taxable Value"),
+    "b2b_template": ("Place Of Supply", _rate_sum("Total Rate"), "Taxable Value"),
+    "amazon_b2b": ("Ship To State", _rate_sum("Cgst Rate", "Sgst Rate", "Utgst Rate", "Igst Rate", scale=100),
+                   "Tax Exclusive Gross"),
+}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+def _rows(result):
+    return sum(len(df) for _, df in result.frames())
+
+def _read(adapter, path):
+    if adapter.key == "flipkart":
+        opts = {sheet: schema.read_options() for sheet, schema in adapter.sections.items()}
+        sheets, _, _ = read_sheets(path, opts)
+        return sheets
+    df, _, _, _ = read_timed(path, **adapter.schema.read_options())
+    return df
+
+def _micro_frame(adapter, data):
+    if adapter.key == "flipkart":
+        return adapter.sections[adapter.sheet_7b].coerce(data[adapter.sheet_7b].copy())
+    return adapter.schema.coerce(data.copy())
+
+def run_case(platform, rows, data_dir, fmt="csv", seed=0, repeat=1):
+    """Time every stage for one generated file; returns one record per stage (best of ``repeat`` runs)."""
+    adapter = ADAPTERS[platform]
+    state_col, rate_of, taxable_col = SPECS[platform]
+    user_state = mapped_state(BUSINESS_STATE)
+    path = write_upload(platform, rows, data_dir, fmt, seed)
+    best = {}
+
+    def record(stage, seconds, rows_in, rows_out):
+        if stage not in best or seconds < best[stage]["seconds"]:
+            best[stage] = {"platform": platform, "rows": rows, "format": fmt, "stage": stage,
+                           "seconds": round(seconds, 6), "rows_in": rows_in, "rows_out": rows_out}
+
+    for _ in range(repeat):
+        data, seconds = _timed(lambda: _read(adapter, path))
+        n_in = sum(len(df) for df in data.values()) if isinstance(data, dict) else len(data)
+        record("read", seconds, rows, n_in)
+
+        df = _micro_frame(adapter, data)
+
+        def normalise():
+            out = {"state": normalise_states(df[state_col]), "rate": round_gst_rates(rate_of(df))}
+            if "Invoice Date" in df.columns:
+                out["date"] = parse_invoice_dates(df["Invoice Date"])[0]
+            return out
+        norm, seconds = _timed(normalise)
+        record("normalise", seconds, len(df), len(norm["state"]))
+
+        _, seconds = _timed(lambda: split_gst(df[taxable_col], norm["rate"], norm["state"], user_state))
+        record("tax_split", seconds, len(df), len(df))
+
+        keyed = df[[taxable_col]].assign(State=norm["state"], Rate=norm["rate"])
+        grouped, seconds = _timed(lambda: keyed.groupby(["State", "Rate"], observed=True)[taxable_col].sum())
+        record("groupby", seconds, len(keyed), len(grouped))
+
+        fresh = copy.deepcopy(data)
+        if adapter.key == "flipkart":
+            result, seconds = _timed(lambda: adapter.transform_sections(fresh, path, BUSINESS_STATE))
+        else:
+            result, seconds = _timed(lambda: adapter.transform(fresh, path, BUSINESS_STATE))
+        record("transform", seconds, n_in, _rows(result))
+
+        def merge():
+            merged = empty_global_data()
+            merged.add(result)
+            return merged, merged.views()
+        (merged, views), seconds = _timed(merge)
+        record("merge", seconds, _rows(result), sum(len(v) for v in views.values()))
+
+        def export():
+            reports = [r for r in build_reports(merged, {}, views).values() if not r.empty]
+            for r in reports:
+                to_bytes(r, fmt)
+            return reports
+        reports, seconds = _timed(export)
+        record("export", seconds, sum(len(v) for v in views.values()), sum(len(r) for r in reports))
+    return [best[stage] for stage in STAGES]
+
+def compare(results, baseline, tolerance=0.25, floor=0.005):
+    """Stages slower than ``baseline`` by more than ``tolerance`` (a fraction) and ``floor`` seconds.
+
+    Returns ``[(key, old seconds, new seconds)]``; stages missing from the baseline are ignored.
+    """
+    key = lambda r: (r["platform"], r["rows"], r["format"], r["stage"])
+    old = {key(r): r["seconds"] for r in baseline["results"]}
+    slower = []
+    for r in results:
+        before = old.get(key(r))
+        if before is not None and r["seconds"] > before * (1 + tolerance) and r["seconds"] - before > floor:
+            slower.append((key(r), before, r["seconds"]))
+    return slower
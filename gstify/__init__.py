@@ -0,0 +1,24 @@
+"""GST processing core shared by the Streamlit app and the ``gstify`` command."""
+from .adapters import (ADAPTERS, FileResult, MissingColumnsError, NoRowsError, PlatformAdapter, ProcessingError,
+                       get_adapter, mapped_state)
+from .cache import ResultCache, content_digest
+from .constants import ECO_OPERATORS, ECO_PLATFORMS, GST_SLABS, INDIAN_STATES_LIST, STATE_ALIASES, STATE_NAME_MAPPING
+from .export import (EXPORT_FORMATS, MIME_TYPES, to_bytes, to_csv_bytes, to_excel_bytes, to_zip_bytes, write_bundle,
+                     write_excel, write_reports)
+from .frames import compact_frame, concat_frames, frame_bytes
+from .gst import (calculate_gst_amounts, custom_round_gst_rate, format_invoice_date, off_slab_counts, parse_invoice_dates,
+                  round_gst_rates, split_gst)
+from .gstr1 import build_gstr1, gstr1_filename, validate_filing
+from .invoices import INVOICE_KEY, InvoiceIndex
+from .jobs import Job, JobManager
+from .parallel import FileOutcome, default_workers, executor_usable, make_executor, process_files
+from .pipeline import process_file
+from .profiling import capture, emit, profiled, stage, summarise
+from .readers import read_any, read_header, stream_chunksize
+from .reconcile import DEFAULT_TOLERANCE, reconcile, reconciliation_notes
+from .reports import (ECO_BREAKDOWNS, REPORTS, ReportCache, add_result, build_eco_tcs, build_report, build_reports,
+                      eco_tcs_report, eco_totals, empty_global_data, get_compiled_data, merged_views)
+from .schemas import SCHEMAS, Column, Schema
+from .sessions import SESSION_ID_PATTERN, Session, SessionStore, new_session_id
+from .sqlstore import SQLMergedData, available_sql_engines, compare_reports, sql_engine
+from .states import STATE_CODES, normalise_states, state_code, unmapped_states
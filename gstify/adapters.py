@@ -0,0 +1,501 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .constants import HSN_B2B_COLUMNS, HSN_COLUMNS
+from .frames import concat_frames
+from .gst import calculate_gst_amounts, off_slab_counts, parse_invoice_dates, round_gst_rates
+from . import schemas
+from .profiling import stage
+from .readers import log, read_csv_chunks, read_header, read_sheets, read_timed, source_name
+from .states import normalise_states, state_code
+
+
+class ProcessingError(Exception):
+    """A file could not be processed."""
+
+class MissingColumnsError(ProcessingError):
+    pass
+
+class NoRowsError(ProcessingError):
+    """Nothing was left to aggregate after filtering."""
+
+@dataclass
+class FileResult:
+    name: str
+    b2cs: Optional[pd.DataFrame] = None
+    hsn: Optional[pd.DataFrame] = None
+    b2b: Optional[pd.DataFrame] = None
+    hsn_b2b: Optional[pd.DataFrame] = None
+    reader: str = ""
+    parse_seconds: float = 0.0
+    rows_read: int = 0
+    prepared: bool = False   # frames already normalised and compacted for merging (``prepare_result``)
+    digest: str = ""
+    cached: bool = False
+    notes: list = field(default_factory=list)   # things the user should know, e.g. rows that were skipped
+    off_slab: dict = field(default_factory=dict)   # {rounded rate: rows} for rates that are not a GST slab
+
+    @property
+    def source_platform(self):
+        """The ``Source_Platform`` this file's HSN rows are tagged with, if any."""
+        for df in (self.hsn, self.hsn_b2b):
+            if df is not None and 'Source_Platform' in df.columns and len(df):
+                return df['Source_Platform'].iloc[0]
+        return None
+
+    def frames(self):
+        for kind in ("b2cs", "hsn", "b2b", "hsn_b2b"):
+            df = getattr(self, kind)
+            if df is not None:
+                yield kind, df
+
+    def messages(self):
+        """``notes`` plus a line about rows whose GST rate is off the legal slabs."""
+        out = list(self.notes)
+        if self.off_slab:
+            detail = ", ".join(f"{rate}%: {rows}" for rate, rows in sorted(self.off_slab.items()))
+            rows = sum(self.off_slab.values())
+            out.append(f"{self.name}: {rows} row(s) with a GST rate outside the legal slabs ({detail})")
+        return out
+
+def add_counts(total, counts):
+    for key, n in counts.items():
+        total[key] = total.get(key, 0) + n
+    return total
+
+# Keys used to fold per-chunk aggregates together; b2b rows are per invoice and are only appended.
+FOLD_KEYS = {
+    "b2cs": ['State','GST Rate'],
+    "hsn": ['HSN','GST Rate','Source_Platform'],
+    "hsn_b2b": ['HSN','Description','UQC','Rate','Source_Platform'],
+}
+
+def fold_aggregates(kind, running, part):
+    """Add ``part`` into the running ``kind`` aggregate, keeping ``part``'s column order."""
+    if running is None:
+        return part
+    with stage("fold", len(running) + len(part)) as s:
+        merged = concat_frames([running, part])
+        out = merged.groupby(FOLD_KEYS[kind], as_index=False, sort=True, observed=True).sum()[list(part.columns)]
+        s.rows_out = len(out)
+    return out
+
+def _timed_chunks(chunks, result):
+    # Only time spent inside the CSV parser counts as parse time, not the per-chunk transform.
+    it = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        with stage("read") as s:
+            chunk = next(it, None)
+            s.rows_out = 0 if chunk is None else len(chunk)
+        result.parse_seconds += time.perf_counter() - start
+        if chunk is None:
+            return
+        result.rows_read += len(chunk)
+        yield chunk
+
+def drop_undated(df, fname):
+    """Parse ``Invoice Date`` in bulk and drop the rows without a readable one; returns ``(df, notes)``."""
+    raw = df['Invoice Date']
+    dates, unparsed = parse_invoice_dates(raw)
+    notes = []
+    if unparsed.any():
+        examples = ", ".join(repr(v) for v in raw[unparsed].dropna().astype(str).unique()[:3])
+        notes.append(f"{fname}: skipped {int(unparsed.sum())} row(s) without a readable Invoice Date"
+                     + (f" (e.g. {examples})" if examples else ""))
+    df = df.assign(**{'Invoice Date': dates})
+    return df[~unparsed], notes
+
+def hsn_key(codes):
+    # Text-typed reads keep "6109" and "6109.0" apart; collapse them the way the merged views do.
+    return codes.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+
+def mapped_state(business_state):
+    return state_code(business_state)
+
+# ------------------------------
+# Adapters
+# ------------------------------
+class PlatformAdapter:
+    """One upload format. ``process`` turns a single file into b2cs/hsn/b2b/hsn_b2b frames."""
+    key = None
+    label = None
+    schema = None
+    needs_business_state = False
+
+    def process(self, src, business_state, name=None, chunksize=None):
+        """Process one file; with ``chunksize`` a CSV is streamed and only its aggregates are kept.
+
+        The header is checked against ``schema`` first, then only the declared columns are read.
+        """
+        fname = source_name(src, name)
+        header = read_header(src, fname)
+        self.check_columns(header, fname)
+        opts = self.schema.read_options(header)
+        if chunksize and fname.lower().endswith(".csv"):
+            result = self.process_chunks(read_csv_chunks(src, chunksize, **opts), fname, business_state)
+        else:
+            df, fname, reader, seconds = read_timed(src, fname, **opts)
+            result = self.timed_transform(df, fname, business_state)
+            result.reader, result.parse_seconds, result.rows_read = reader, seconds, len(df)
+        log.info("%s: parsed in %.3fs (%s)", fname, result.parse_seconds, result.reader)
+        return result
+
+    def process_chunks(self, chunks, fname, business_state):
+        result = FileResult(fname, reader="csv-chunked")
+        b2b_parts = []
+        empty = None
+        for chunk in _timed_chunks(chunks, result):
+            try:
+                part = self.timed_transform(chunk, fname, business_state)
+            except NoRowsError as e:
+                empty = e; continue
+            result.notes.extend(part.notes)
+            add_counts(result.off_slab, part.off_slab)
+            for kind, df in part.frames():
+                if kind == "b2b":
+                    b2b_parts.append(df)
+                else:
+                    setattr(result, kind, fold_aggregates(kind, getattr(result, kind), df))
+        if b2b_parts:
+            result.b2b = pd.concat(b2b_parts, ignore_index=True)
+        if empty is not None and next(result.frames(), None) is None:
+            raise empty
+        return result
+
+    def check_columns(self, columns, fname):
+        missing = self.schema.missing(columns)
+        if missing:
+            raise MissingColumnsError(f"{fname}: missing columns {missing}")
+
+    def transform(self, df, fname, business_state):
+        raise NotImplementedError
+
+    def timed_transform(self, df, fname, business_state):
+        """``transform`` as a profiling stage; its own time is the filtering and group-bys around the helpers."""
+        with stage("transform", len(df)) as s:
+            result = self.transform(df, fname, business_state)
+            s.rows_out = sum(len(frame) for _, frame in result.frames())
+        return result
+
+class AmazonAdapter(PlatformAdapter):
+    key = "amazon"
+    label = "Amazon"
+    schema = schemas.AMAZON
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        df['Ship To State'] = normalise_states(df['Ship To State'])
+        df = df[df['Tax Exclusive Gross'] != 0].copy()
+        if df.empty: raise NoRowsError(f"{fname}: no rows after filtering Taxable>0")
+        df['Rate'] = round_gst_rates(df[['Cgst Rate','Sgst Rate','Igst Rate']].sum(axis=1)*100)
+        b2cs = df.groupby(['Ship To State','Rate'], observed=True)['Tax Exclusive Gross'].sum().reset_index()
+        b2cs.columns = ['State','GST Rate','Taxable Value']
+
+        df = calculate_gst_amounts(df,'Tax Exclusive Gross','Rate','Ship To State', mapped_state(business_state))
+        df['Total Rate'] = df['Rate']
+        hsn = df.groupby([hsn_key(df['Hsn/sac']), df['Total Rate'].astype(int)]).agg(
+            Quantity=('Quantity','sum'),
+            Invoice_Amount=('Invoice Amount','sum'),
+            Taxable_Value=('Tax Exclusive Gross','sum'),
+            IGST=('IGST','sum'),
+            CGST=('CGST','sum'),
+            SGST=('SGST','sum')
+        ).reset_index()
+        hsn.columns = HSN_COLUMNS
+        hsn['Source_Platform'] = 'Amazon'
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab_counts(df['Rate']))
+
+class FlipkartAdapter(PlatformAdapter):
+    key = "flipkart"
+    label = "Flipkart"
+    needs_business_state = True
+    sheet_7a = "Section 7(A)(2) in GSTR-1"
+    sheet_7b = "Section 7(B)(2) in GSTR-1"
+    sheet_12 = "Section 12 in GSTR-1"
+
+    sections = {
+        sheet_7a: schemas.FLIPKART_7A,
+        sheet_7b: schemas.FLIPKART_7B,
+        sheet_12: schemas.FLIPKART_12,
+    }
+
+    def process(self, src, business_state, name=None, chunksize=None):
+        fname = source_name(src, name)
+        opts = {sheet: schema.read_options() for sheet, schema in self.sections.items()}
+        sheets, reader, seconds = read_sheets(src, opts, fname)
+        with stage("transform", sum(len(df) for df in sheets.values())) as s:
+            result = self.transform_sections(sheets, fname, business_state)
+            s.rows_out = sum(len(frame) for _, frame in result.frames())
+        result.reader, result.parse_seconds = reader, seconds
+        result.rows_read = sum(len(df) for df in sheets.values())
+        log.info("%s: parsed in %.3fs (%s)", fname, seconds, reader)
+        return result
+
+    def transform_sections(self, sheets, fname, business_state):
+        """Build the result from the ``{sheet name: df}`` read from one workbook."""
+        # Sections are optional; one is used only when all of its columns are present.
+        usable = {sheet: self.sections[sheet].coerce(df) for sheet, df in sheets.items()
+                  if not self.sections[sheet].missing(df.columns)}
+        b2cs_parts = []
+        hsn = None
+        off_slab = {}
+        if self.sheet_7a in usable:
+            df7a = usable[self.sheet_7a]
+            b2cs_7a = pd.DataFrame({
+                "State": normalise_states(pd.Series([business_state]*len(df7a), index=df7a.index)),
+                "GST Rate":round_gst_rates(df7a["CGST %"]+df7a["SGST/UT %"]),
+                "Taxable Value":df7a["Aggregate Taxable Value Rs."]
+            })
+            b2cs_parts.append(b2cs_7a[["State","GST Rate","Taxable Value"]])
+            add_counts(off_slab, off_slab_counts(b2cs_7a["GST Rate"]))
+        if self.sheet_7b in usable:
+            df7b = usable[self.sheet_7b]
+            out = pd.DataFrame({
+                "State": normalise_states(df7b["Delivered State (PoS)"]),
+                "GST Rate": round_gst_rates(df7b["IGST %"]),
+                "Taxable Value": df7b["Aggregate Taxable Value Rs."]
+            })
+            b2cs_parts.append(out[["State","GST Rate","Taxable Value"]])
+            add_counts(off_slab, off_slab_counts(out["GST Rate"]))
+        if self.sheet_12 in usable:
+            hsn = self._hsn(usable[self.sheet_12])
+            add_counts(off_slab, off_slab_counts(hsn["GST Rate"]))
+        b2cs = concat_frames(b2cs_parts) if b2cs_parts else None
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab)
+
+    def _hsn(self, dfx):
+        hsn = pd.DataFrame({
+            "HSN": hsn_key(dfx["HSN Number"]),
+            "Quantity": dfx["Total Quantity in Nos."],
+            "Taxable Value": dfx["Total Taxable Value Rs."],
+            "IGST": dfx["IGST Amount Rs."],
+            "CGST": dfx["CGST Amount Rs."],
+            "SGST": dfx["SGST Amount Rs."]
+        })
+        hsn["Invoice Amount"] = hsn["Taxable Value"] + hsn["IGST"] + hsn["CGST"] + hsn["SGST"]
+        total_tax = hsn["IGST"] + hsn["CGST"] + hsn["SGST"]
+        hsn["GST Rate"] = round_gst_rates(np.where(hsn["Taxable Value"]!=0, (total_tax/hsn["Taxable Value"])*100, 0)).to_numpy()
+        hsn = hsn[HSN_COLUMNS]
+        hsn["Source_Platform"] = "Flipkart"
+        return hsn
+
+class JiomartAdapter(PlatformAdapter):
+    key = "jiomart"
+    label = "Jiomart"
+    schema = schemas.JIOMART
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        df["Customer's Billing State"] = normalise_states(df["Customer's Billing State"])
+        df['Rate'] = round_gst_rates(df[['IGST Rate','CGST Rate','SGST Rate (or UTGST as applicable)']].sum(axis=1))
+        b2cs = df.groupby(["Customer's Billing State",'Rate'], observed=True)['Taxable Value (Final Invoice Amount -Taxes)'].sum().reset_index()
+        b2cs.columns = ['State','GST Rate','Taxable Value']
+        df = calculate_gst_amounts(df,'Taxable Value (Final Invoice Amount -Taxes)','Rate',"Customer's Billing State", mapped_state(business_state))
+        hsn = df.groupby([hsn_key(df['HSN Code']), df['Rate'].astype(int)]).agg(
+            Quantity=('Item Quantity','sum'),
+            Invoice_Amount=('Final Invoice Amount (Offer Price minus Seller Coupon Amount)','sum'),
+            Taxable_Value=('Taxable Value (Final Invoice Amount -Taxes)','sum'),
+            IGST=('IGST Amount','sum'),
+            CGST=('CGST Amount','sum'),
+            SGST=('SGST Amount (Or UTGST as applicable)','sum')
+        ).reset_index()
+        hsn.columns = HSN_COLUMNS
+        hsn['Source_Platform'] = 'Jiomart'
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab_counts(df['Rate']))
+
+class MeeshoAdapter(PlatformAdapter):
+    key = "meesho_sales"
+    label = "Meesho Sales"
+    source_platform = 'Meesho_Sales'
+    sign = 1
+    schema = schemas.MEESHO
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        df['gst_rate'] = round_gst_rates(df['gst_rate'])
+        df['end_customer_state_new'] = normalise_states(df['end_customer_state_new'])
+        b2cs = df.groupby(['end_customer_state_new','gst_rate'], observed=True)['total_taxable_sale_value'].sum().reset_index()
+        b2cs.columns = ['State','GST Rate','Taxable Value']
+        df = calculate_gst_amounts(df,'total_taxable_sale_value','gst_rate','end_customer_state_new', mapped_state(business_state))
+        hsn = df.groupby([hsn_key(df['hsn_code']), df['gst_rate'].astype(int)]).agg(
+            Quantity=('quantity','sum'),
+            Invoice_Amount=('total_invoice_value','sum'),
+            Taxable_Value=('total_taxable_sale_value','sum'),
+            IGST=('IGST','sum'),
+            CGST=('CGST','sum'),
+            SGST=('SGST','sum')
+        ).reset_index()
+        hsn.columns = HSN_COLUMNS
+        if self.sign < 0:
+            # Returns are stored negated so they net off against sales in the merged views.
+            b2cs['Taxable Value'] = -b2cs['Taxable Value']
+            for c in ['Quantity','Invoice Amount','Taxable Value','IGST','CGST','SGST']:
+                hsn[c] = -pd.to_numeric(hsn[c], errors='coerce').fillna(0)
+        hsn['Source_Platform'] = self.source_platform
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab_counts(df['gst_rate']))
+
+class MeeshoReturnAdapter(MeeshoAdapter):
+    key = "meesho_return"
+    label = "Meesho Return"
+    source_platform = 'Meesho_Return'
+    sign = -1
+
+class GlowroadAdapter(PlatformAdapter):
+    key = "glowroad"
+    label = "Glowroad"
+    schema = schemas.GLOWROAD
+
+    def transform(self, df, fname, business_state):
+        df['Product HSN code'] = df['Product HSN code'].astype(str).str.replace('.','', regex=False).str.replace(',','', regex=False).str.strip()
+        self.schema.coerce(df)
+        df = df[df['Base amount for GST '] != 0].copy()
+        if df.empty: raise NoRowsError(f"{fname}: no rows after filtering Taxable>0")
+        df['Buyer state'] = normalise_states(df['Buyer state'])
+        df['Rate'] = round_gst_rates(df['GST %'])
+        b2cs = df.groupby(['Buyer state','Rate'], observed=True)['Base amount for GST '].sum().reset_index()
+        b2cs.columns = ['State','GST Rate','Taxable Value']
+        df['Product HSN code'] = df['Product HSN code'].astype(str).str.replace(r'\.0$','', regex=True).str.strip()
+        df['Quantity'] = 1
+        df = calculate_gst_amounts(df,'Base amount for GST ','Rate','Buyer state', mapped_state(business_state))
+        hsn = df.groupby([df['Product HSN code'], df['Rate'].astype(int)]).agg(
+            Quantity=('Quantity','sum'),
+            Invoice_Amount=('Customer invoice value (GMV)','sum'),
+            Taxable_Value=('Base amount for GST ','sum'),
+            CGST=('CGST','sum'),
+            SGST=('SGST','sum'),
+            IGST=('IGST','sum')
+        ).reset_index()
+        hsn.columns = ['HSN','GST Rate','Quantity','Invoice Amount','Taxable Value','CGST','SGST','IGST']
+        hsn = hsn[HSN_COLUMNS]
+        hsn['Source_Platform'] = 'Glowroad'
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab_counts(df['Rate']))
+
+class B2COtherAdapter(PlatformAdapter):
+    key = "b2c_other"
+    label = "B2C (Other)"
+    schema = schemas.B2C_OTHER
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        df = df[df['Taxable Value'] != 0].copy()
+        if df.empty: raise NoRowsError(f"{fname}: no rows after filtering Taxable>0")
+        df['Place Of Supply'] = normalise_states(df['Place Of Supply'])
+        df['Rate'] = round_gst_rates(df['Rate'])
+        b2cs = df.groupby(['Place Of Supply','Rate'], observed=True)['Taxable Value'].sum().reset_index()
+        b2cs.columns = ['State','GST Rate','Taxable Value']
+        hsn = df.groupby([hsn_key(df['HSN']), df['Rate'].astype(int)]).agg(
+            Quantity=('Total Quantity','sum'),
+            Invoice_Amount=('Total Value','sum'),
+            Taxable_Value=('Taxable Value','sum'),
+            IGST=('Integrated Tax Amount','sum'),
+            CGST=('Central Tax Amount','sum'),
+            SGST=('State/UT Tax Amount','sum')
+        ).reset_index()
+        hsn.columns = HSN_COLUMNS
+        hsn['Source_Platform'] = 'B2C_Other'
+        return FileResult(fname, b2cs=b2cs, hsn=hsn, off_slab=off_slab_counts(df['Rate']))
+
+class B2BTemplateAdapter(PlatformAdapter):
+    # 'Invoice Value' is the invoice total, repeated on every line of the invoice as in the GST offline tool.
+    # Tagged 'B2B_Template', which is not in ``PER_LINE_INVOICE_VALUE``.
+    key = "b2b_template"
+    label = "B2B Template"
+    schema = schemas.B2B_TEMPLATE
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        dff = df[df['Taxable Value'].notnull() & (df['Taxable Value']>0)].copy()
+        if dff.empty: raise NoRowsError(f"{fname}: no positive Taxable Value rows")
+        dff, notes = drop_undated(dff, fname)
+        if dff.empty: raise NoRowsError(f"{fname}: no valid Invoice Dates")
+        dff['Total Rate'] = round_gst_rates(dff['Total Rate'])
+        b2b_output = pd.DataFrame({
+            'GSTIN/UIN of Recipient': dff['GSTIN/UIN of Recipient'].astype(str),
+            'Receiver Name': dff['Receiver Name'].astype(str),
+            'Invoice Number': dff['Invoice Number'].astype(str),
+            'Invoice Date': dff['Invoice Date'].astype(str),
+            'Invoice Value': dff['Invoice Value'],
+            'Place Of Supply': dff['Place Of Supply'].astype(str),
+            'Reverse Charge':'N',
+            'Applicable % of Tax Rate':'',
+            'Invoice Type':'Regular',
+            'E-Commerce GSTIN':'',
+            'Rate': dff['Total Rate'],
+            'Taxable Value': dff['Taxable Value'],
+            'Cess Amount': dff['Cess Amount']
+        })
+        dff = calculate_gst_amounts(dff,'Taxable Value','Total Rate','Place Of Supply', mapped_state(business_state))
+        h = dff.groupby([hsn_key(dff['HSN']), dff['Total Rate'].astype(int)]).agg(
+            Total_Quantity=('Total Quantity','sum'),
+            Total_Value=('Invoice Value','sum'),
+            Taxable_Value=('Taxable Value','sum'),
+            Integrated_Tax_Amount=('IGST','sum'),
+            Central_Tax_Amount=('CGST','sum'),
+            State_UT_Tax_Amount=('SGST','sum'),
+            Cess_Amount=('Cess Amount','sum')
+        ).reset_index()
+        h['Description']=''; h['UQC']='PCS-PIECES'
+        out = h[['HSN','Description','UQC','Total_Quantity','Total_Value','Taxable_Value','Integrated_Tax_Amount','Central_Tax_Amount','State_UT_Tax_Amount','Cess_Amount','Total Rate']].copy()
+        out.columns = HSN_B2B_COLUMNS
+        out['Source_Platform'] = 'B2B_Template'
+        return FileResult(fname, b2b=b2b_output, hsn_b2b=out, notes=notes, off_slab=off_slab_counts(dff['Total Rate']))
+
+class AmazonB2BAdapter(PlatformAdapter):
+    # 'Invoice Amount' (output as 'Invoice Value') is the amount of that line only; an invoice's lines add up to it.
+    # Tagged 'Amazon_B2B', which ``PER_LINE_INVOICE_VALUE`` lists.
+    key = "amazon_b2b"
+    label = "Amazon B2B"
+    schema = schemas.AMAZON_B2B
+
+    def transform(self, df, fname, business_state):
+        self.schema.coerce(df)
+        dff = df[df['Tax Exclusive Gross'].notnull() & (df['Tax Exclusive Gross']>0)].copy()
+        dff, notes = drop_undated(dff, fname)
+        if dff.empty: raise NoRowsError(f"{fname}: no valid Invoice Dates")
+        dff['Rate'] = round_gst_rates(dff[['Cgst Rate','Sgst Rate','Utgst Rate','Igst Rate']].sum(axis=1)*100)
+        b2b_output = pd.DataFrame({
+            'GSTIN/UIN of Recipient': dff['Customer Bill To Gstid'].astype(str),
+            'Receiver Name': dff['Buyer Name'].astype(str),
+            'Invoice Number': dff['Invoice Number'].astype(str),
+            'Invoice Date': dff['Invoice Date'].astype(str),
+            'Invoice Value': dff['Invoice Amount'],
+            'Place Of Supply': dff['Ship To State'].astype(str),
+            'Reverse Charge': 'N',
+            'Applicable % of Tax Rate': '',
+            'Invoice Type': 'Regular B2B',
+            'E-Commerce GSTIN': '',
+            'Rate': dff['Rate'],
+            'Taxable Value': dff['Tax Exclusive Gross'],
+            'Cess Amount': dff['Compensatory Cess Rate']
+        })
+        dff = calculate_gst_amounts(dff,'Taxable Value' if 'Taxable Value' in dff.columns else 'Tax Exclusive Gross','Rate','Ship To State', mapped_state(business_state))
+        h = dff.groupby([hsn_key(dff['Hsn/sac']), dff['Rate'].astype(int)]).agg(
+            Total_Quantity=('Quantity','sum'),
+            Total_Value=('Invoice Amount','sum'),
+            Taxable_Value=('Tax Exclusive Gross','sum'),
+            Integrated_Tax_Amount=('IGST','sum'),
+            Central_Tax_Amount=('CGST','sum'),
+            State_UT_Tax_Amount=('SGST','sum'),
+            Cess_Amount=('Compensatory Cess Rate','sum')
+        ).reset_index()
+        h['Description']=''; h['UQC']='PCS-PIECES'
+        out = h[['Hsn/sac','Description','UQC','Total_Quantity','Total_Value','Taxable_Value','Integrated_Tax_Amount','Central_Tax_Amount','State_UT_Tax_Amount','Cess_Amount','Rate']].copy()
+        out.columns = HSN_B2B_COLUMNS
+        out['Source_Platform'] = 'Amazon_B2B'
+        return FileResult(fname, b2b=b2b_output, hsn_b2b=out, notes=notes, off_slab=off_slab_counts(dff['Rate']))
+
+ADAPTERS = {a.key: a for a in (
+    AmazonAdapter(), FlipkartAdapter(), JiomartAdapter(), MeeshoAdapter(), MeeshoReturnAdapter(),
+    GlowroadAdapter(), B2COtherAdapter(), B2BTemplateAdapter(), AmazonB2BAdapter(),
+)}
+
+def get_adapter(key):
+    try:
+        return ADAPTERS[key]
+    except KeyError:
+        raise ValueError(f"unknown platform {key!r}; expected one of {', '.join(ADAPTERS)}") from None
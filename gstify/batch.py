@@ -0,0 +1,307 @@
+"""``gstify-batch`` command: file for many clients in one run.
+
+A manifest lists the clients, one per JSON object (or CSV row)::
+
+    [{"client": "acme", "state": "Madhya Pradesh", "input_dir": "acme/2025-04",
+      "eco_gstins": {"Amazon": "23AAICA3918J1CT"}, "gstin": "23ABCDE1234F1Z5", "period": "042025"}]
+
+``input_dir`` is laid out as for ``gstify`` (one sub-directory per platform) and is relative to the manifest.
+In a CSV manifest operator GSTINs go in ``<Operator> GSTIN`` columns. Each client's reports are written to
+``<output>/<client>/``. Clients run in parallel, one per worker process, and a client whose run raises (or
+whose worker dies) is retried. Every finished client is appended to ``<output>/batch-journal.jsonl``; a rerun
+skips clients already done unless their settings or input files have changed since, so an interrupted batch
+picks up where it stopped. Timings per client and overall throughput go to ``<output>/batch-summary.json``.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass, field
+
+from .cache import ResultCache
+from .cli import discover_files, process_directory, write_outputs
+from .constants import ECO_OPERATORS, INDIAN_STATES_LIST
+from .gstr1 import validate_filing
+from .parallel import default_workers, executor_usable, make_executor
+from .reports import ECO_BREAKDOWNS
+
+JOURNAL = "batch-journal.jsonl"
+SUMMARY = "batch-summary.json"
+CLIENT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 ._-]{0,63}$")
+
+
+@dataclass
+class Client:
+    name: str
+    state: str
+    input_dir: str
+    eco_gstins: dict = field(default_factory=dict)
+    gstin: str = ""
+    period: str = ""
+
+@dataclass
+class BatchOptions:
+    csv: bool = False
+    bundle: bool = False
+    eco_breakdowns: tuple = ()
+    chunksize: object = None
+    cache_spec: object = None   # (root, max_bytes) of the shared parsed-file cache, or None
+
+@dataclass
+class ClientOutcome:
+    name: str
+    status: str   # "done", "failed" or "skipped" (already done in an earlier run)
+    seconds: float = 0.0
+    attempts: int = 0
+    files: int = 0
+    bytes: int = 0
+    errors: list = field(default_factory=list)   # files that could not be processed
+    error: str = ""   # why the client failed
+    outputs: list = field(default_factory=list)
+
+# ------------------------------
+# Manifest
+# ------------------------------
+def _client(entry, base_dir):
+    def text(key):
+        value = entry.get(key)
+        return "" if value is None else str(value).strip()
+
+    name, state, input_dir = text("client"), text("state"), text("input_dir")
+    if not CLIENT_NAME_PATTERN.match(name):
+        raise ValueError(f"client name {name!r} must be 1-64 letters, digits, spaces, '.', '_' or '-'")
+    if state not in INDIAN_STATES_LIST:
+        raise ValueError(f"unknown state {state!r}")
+    gstins = entry.get("eco_gstins") or {op: text(f"{op} GSTIN") for op in ECO_OPERATORS}
+    unknown = set(gstins) - set(ECO_OPERATORS)
+    if unknown:
+        raise ValueError(f"unknown operator(s) {', '.join(sorted(unknown))}; use {', '.join(ECO_OPERATORS)}")
+    client = Client(name, state, os.path.join(base_dir, input_dir),
+                    {op: str(gstins.get(op) or "").strip() for op in ECO_OPERATORS},
+                    text("gstin").upper(), text("period"))
+    if not input_dir or not os.path.isdir(client.input_dir):
+        raise ValueError(f"input_dir {client.input_dir!r} is not a directory")
+    if client.gstin or client.period:
+        validate_filing(client.gstin, client.period)
+    return client
+
+def load_manifest(path):
+    """The clients listed in a JSON or CSV manifest; raises ``ValueError`` naming the first bad entry."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            entries = [(row, f"{path}:{i}") for i, row in enumerate(csv.DictReader(fh), start=2)]
+    else:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        data = data.get("clients", []) if isinstance(data, dict) else data
+        entries = [(entry, f"{path}: client #{i}") for i, entry in enumerate(data, start=1)]
+    clients, seen = [], set()
+    for entry, where in entries:
+        try:
+            client = _client(entry, base_dir)
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}") from None
+        if client.name.lower() in seen:
+            raise ValueError(f"{where}: duplicate client {client.name!r}")
+        seen.add(client.name.lower())
+        clients.append(client)
+    return clients
+
+def fingerprint(client):
+    """Hash of the client's settings and the names, sizes and mtimes of its input files."""
+    files = []
+    for platform, path in discover_files(client.input_dir):
+        st = os.stat(path)
+        files.append([platform, os.path.basename(path), st.st_size, st.st_mtime_ns])
+    blob = json.dumps([asdict(client), files], sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+# ------------------------------
+# One client
+# ------------------------------
+def run_client(client, out_dir, options):
+    """Process one client's inputs and write its report set to ``out_dir``; runs in a worker process."""
+    start = time.perf_counter()
+    cache = ResultCache(*options.cache_spec) if options.cache_spec else None
+    items = list(discover_files(client.input_dir))
+    global_data, errors = process_directory(client.input_dir, client.state, options.chunksize, cache, workers=1,
+                                            log=lambda msg: None)
+    # Written next to the final folder and swapped in, so a crash never leaves a half-written report set.
+    partial = f"{out_dir}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    written = write_outputs(global_data, client.eco_gstins, partial, options.csv, options.bundle, client.gstin or None,
+                            client.period or None, options.eco_breakdowns)
+    os.makedirs(partial, exist_ok=True)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(partial, out_dir)
+    return ClientOutcome(client.name, "done", seconds=time.perf_counter() - start, files=len(items),
+                         bytes=sum(os.path.getsize(path) for _, path in items), errors=errors,
+                         outputs=[os.path.join(out_dir, os.path.basename(path)) for path in written])
+
+# ------------------------------
+# Journal
+# ------------------------------
+def read_journal(out_root):
+    """``{client: fingerprint}`` of the clients the journal records as done (the latest record wins)."""
+    done = {}
+    try:
+        with open(os.path.join(out_root, JOURNAL), encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue   # a line cut short by a crash
+                if record.get("status") == "done":
+                    done[record["client"]] = record.get("fingerprint")
+                else:
+                    done.pop(record.get("client"), None)
+    except FileNotFoundError:
+        pass
+    return done
+
+def _journal(out_root, outcome, fp):
+    record = {"client": outcome.name, "status": outcome.status, "fingerprint": fp, "seconds": round(outcome.seconds, 3),
+              "attempts": outcome.attempts, "files": outcome.files, "errors": outcome.errors, "error": outcome.error,
+              "finished": time.time()}
+    with open(os.path.join(out_root, JOURNAL), "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+
+# ------------------------------
+# Batch
+# ------------------------------
+def _client_dir(out_root, client):
+    return os.path.join(out_root, client.name)
+
+def _attempts(jobs, out_root, options, executor):
+    """Yield ``(client, outcome or None, error)`` for one attempt at every job."""
+    if executor is None:
+        for client in jobs:
+            try:
+                yield client, run_client(client, _client_dir(out_root, client), options), ""
+            except Exception as e:
+                yield client, None, f"{type(e).__name__}: {e}"
+        return
+    futures = {executor.submit(run_client, client, _client_dir(out_root, client), options): client for client in jobs}
+    for future in as_completed(futures):
+        try:
+            yield futures[future], future.result(), ""
+        except Exception as e:
+            # Includes a worker that died; the pool is rebuilt for the next round.
+            yield futures[future], None, f"{type(e).__name__}: {e}"
+
+def run_batch(clients, out_root, options=None, workers=None, retries=1, resume=True, log=print):
+    """Run every client, retrying failures up to ``retries`` times; returns ``(outcomes, summary)``.
+
+    ``outcomes`` follow the order of ``clients``. With ``resume`` clients the journal records as done with the
+    same fingerprint are skipped.
+    """
+    options = options or BatchOptions()
+    workers = workers or default_workers()
+    os.makedirs(out_root, exist_ok=True)
+    done = read_journal(out_root) if resume else {}
+    prints = {client.name: fingerprint(client) for client in clients}
+    outcomes, todo = {}, []
+    for client in clients:
+        if done.get(client.name) == prints[client.name]:
+            outcomes[client.name] = ClientOutcome(client.name, "skipped")
+        else:
+            todo.append(client)
+    if len(todo) < len(clients):
+        log(f"resuming: {len(clients) - len(todo)} client(s) already done")
+
+    start, attempt, finished, total = time.perf_counter(), 0, 0, len(todo)
+    while todo and attempt <= retries:
+        attempt += 1
+        executor = make_executor(min(workers, len(todo))) if workers > 1 and len(todo) > 1 else None
+        failed = []
+        try:
+            for client, outcome, error in _attempts(todo, out_root, options, executor):
+                if outcome is None:
+                    outcome = ClientOutcome(client.name, "failed", error=error)
+                    if attempt <= retries:
+                        failed.append(client)
+                        log(f"{client.name}: attempt {attempt} failed ({error}); will retry")
+                        continue
+                outcome.attempts = attempt
+                outcomes[client.name] = outcome
+                _journal(out_root, outcome, prints[client.name])
+                finished += 1
+                if outcome.status == "done":
+                    note = f", {len(outcome.errors)} file error(s)" if outcome.errors else ""
+                    log(f"[{finished}/{total}] {client.name}: {outcome.seconds:.1f}s, {outcome.files} file(s){note}")
+                else:
+                    log(f"{client.name}: failed after {attempt} attempt(s): {outcome.error}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=executor_usable(executor), cancel_futures=True)
+        todo = failed
+
+    ordered = [outcomes[client.name] for client in clients]
+    summary = summarise_batch(ordered, time.perf_counter() - start)
+    with open(os.path.join(out_root, SUMMARY), "w", encoding="utf-8") as fh:
+        json.dump({**summary, "clients": [asdict(o) for o in ordered]}, fh, indent=1)
+    return ordered, summary
+
+def summarise_batch(outcomes, wall_seconds):
+    ran = [o for o in outcomes if o.status == "done"]
+    megabytes = sum(o.bytes for o in ran) / 2**20
+    return {
+        "total": len(outcomes), "done": len(ran), "failed": sum(o.status == "failed" for o in outcomes),
+        "skipped": sum(o.status == "skipped" for o in outcomes), "wall_seconds": round(wall_seconds, 3),
+        "client_seconds": round(sum(o.seconds for o in ran), 3), "files": sum(o.files for o in ran),
+        "megabytes": round(megabytes, 3),
+        "clients_per_minute": round(len(ran) * 60 / wall_seconds, 2) if wall_seconds else 0.0,
+        "megabytes_per_second": round(megabytes / wall_seconds, 3) if wall_seconds else 0.0,
+    }
+
+# ------------------------------
+# Command line
+# ------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gstify-batch", description="Build GST reports for every client in a manifest.")
+    parser.add_argument("manifest", help="JSON or CSV file listing client, state, input_dir (and optionally eco GSTINs, gstin, period)")
+    parser.add_argument("-o", "--output-dir", default="gstify_batch", help="one sub-directory per client is written here")
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(), help="clients processed at once (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=1, help="extra attempts for a client whose run fails (default: %(default)s)")
+    parser.add_argument("--no-resume", action="store_true", help="rerun clients the journal records as done")
+    parser.add_argument("--chunksize", type=int, default=None, help="rows per chunk when streaming CSVs; 0 reads whole files")
+    parser.add_argument("--cache-dir", default=None, help="parsed-file cache location (default: $GSTIFY_CACHE_DIR or ~/.cache/gstify)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse every file")
+    parser.add_argument("--csv", action="store_true", help="also write a CSV copy of every report")
+    parser.add_argument("--zip", action="store_true", help="write each client's reports into one GSTify_reports.zip")
+    parser.add_argument("--eco-breakdown", action="append", choices=tuple(ECO_BREAKDOWNS), default=[],
+                        help="also write ECO TCS per operator and GST rate or place of supply; repeatable")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.retries < 0 or args.workers < 1:
+        parser.error("--retries must be 0 or more and --workers at least 1")
+    try:
+        clients = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    options = BatchOptions(args.csv, args.zip, tuple(args.eco_breakdown), args.chunksize,
+                           (cache.root, cache.max_bytes) if cache is not None and cache.enabled else None)
+    outcomes, summary = run_batch(clients, args.output_dir, options, args.workers, args.retries, not args.no_resume,
+                                  log=lambda msg: print(msg, file=sys.stderr))
+    print(f"{'client':<32} {'status':<8} {'seconds':>9} {'files':>6} {'attempts':>8}")
+    for o in outcomes:
+        print(f"{o.name[:32]:<32} {o.status:<8} {o.seconds:>9.2f} {o.files:>6} {o.attempts:>8}")
+    print(f"{summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped in {summary['wall_seconds']:.1f}s "
+          f"({summary['clients_per_minute']:.1f} clients/min, {summary['megabytes_per_second']:.2f} MB/s)")
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
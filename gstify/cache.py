@@ -0,0 +1,120 @@
+"""Content-addressed cache of parsed per-file results.
+
+Entries are keyed by the file's SHA-256, the platform and the business state, and hold the result frames as
+Parquet files in one directory per entry. A directory's mtime doubles as its last-use time for LRU eviction.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from .readers import log
+
+# Bump when adapter output changes so stale entries stop matching.
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_BLOCK = 1024 * 1024
+
+
+def content_digest(src):
+    """SHA-256 of an uploaded file, file object or path; file objects are rewound afterwards."""
+    h = hashlib.sha256()
+    if hasattr(src, 'getbuffer'):
+        h.update(src.getbuffer())
+    elif hasattr(src, 'read'):
+        for block in iter(lambda: src.read(_BLOCK), b""):
+            h.update(block)
+        src.seek(0)
+    else:
+        with open(src, "rb") as fh:
+            for block in iter(lambda: fh.read(_BLOCK), b""):
+                h.update(block)
+    return h.hexdigest()
+
+def cache_key(digest, platform, business_state):
+    return hashlib.sha256(f"{CACHE_VERSION}|{digest}|{platform}|{business_state}".encode()).hexdigest()
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def default_cache_dir():
+    return os.environ.get("GSTIFY_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "gstify")
+
+class ResultCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.enabled = parquet_available()
+        if self.enabled:
+            os.makedirs(self.root, exist_ok=True)
+        else:
+            log.warning("pyarrow is not installed; the parsed-file cache is disabled")
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """The cached frames as ``({kind: df}, meta)``, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+        path = self._entry(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as fh:
+                meta = json.load(fh)
+            frames = {kind: pd.read_parquet(os.path.join(path, f"{kind}.parquet")) for kind in meta["kinds"]}
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(path)
+        return frames, meta
+
+    def put(self, key, frames, **meta):
+        if not self.enabled:
+            return
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            for kind, df in frames.items():
+                df.to_parquet(os.path.join(tmp, f"{kind}.parquet"))
+            with open(os.path.join(tmp, "meta.json"), "w") as fh:
+                json.dump(dict(meta, kinds=list(frames), created=time.time()), fh)
+            os.replace(tmp, self._entry(key))
+        except OSError:
+            # Another worker stored the same entry first, or the disk is full; either way keep going.
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self):
+        """``(path, size, last_used)`` for every complete entry."""
+        out = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            out.append((path, size, os.stat(path).st_mtime))
+        return out
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries()) if self.enabled else 0
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        if self.enabled:
+            for path, _, _ in self.entries():
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,196 @@
+"""``gstify`` command: process a directory of monthly reports without the web UI.
+
+Input files live in one sub-directory per platform, named after the platform key::
+
+    reports/amazon/MTR_B2C-APR-2025.csv
+    reports/flipkart/GSTR1-APR-2025.xlsx
+    reports/amazon_b2b/MTR_B2B-APR-2025.csv
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from .adapters import ADAPTERS
+from .cache import ResultCache
+from .constants import ECO_OPERATORS, INDIAN_STATES_LIST
+from .export import write_bundle, write_reports
+from .gstr1 import build_gstr1, gstr1_filename, validate_filing
+from .parallel import default_workers, make_executor, process_files
+from .profiling import capture, emit, summarise
+from .reconcile import reconciliation_notes
+from .reports import ECO_BREAKDOWNS, REPORTS, add_result, b2b_lines, build_reports, empty_global_data
+from .sqlstore import SQLMergedData, available_sql_engines
+
+INPUT_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+
+def discover_files(input_dir):
+    """Yield ``(platform_key, path)`` for every report file under ``input_dir``, in a stable order."""
+    for key in ADAPTERS:
+        folder = os.path.join(input_dir, key)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if fname.startswith(".") or not fname.lower().endswith(INPUT_EXTENSIONS):
+                continue
+            yield key, os.path.join(folder, fname)
+
+def _parse_gstins(values):
+    gstins = {op: "" for op in ECO_OPERATORS}
+    for item in values or []:
+        op, sep, gstin = item.partition("=")
+        if not sep or op not in gstins:
+            raise argparse.ArgumentTypeError(f"--eco-gstin expects OPERATOR=GSTIN with OPERATOR in {', '.join(ECO_OPERATORS)}")
+        gstins[op] = gstin.strip()
+    return gstins
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gstify", description=__doc__.splitlines()[0])
+    parser.add_argument("input_dir", help="directory with one sub-directory per platform (" + ", ".join(ADAPTERS) + ")")
+    parser.add_argument("-o", "--output-dir", default="gstify_output", help="where the report workbooks are written")
+    parser.add_argument("-s", "--state", required=True, help="your business state, e.g. 'Madhya Pradesh'")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream CSVs in chunks of this many rows (default: only large files; 0 disables)")
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(), help="worker processes (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=None, help="parsed-file cache location (default: $GSTIFY_CACHE_DIR or ~/.cache/gstify)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse every file")
+    parser.add_argument("--csv", action="store_true", help="also write a CSV copy of every report")
+    parser.add_argument("--zip", action="store_true", help="write all reports into one GSTify_reports.zip instead")
+    parser.add_argument("--gstin", default=None, help="your GSTIN; with --period also writes the GSTR-1 portal JSON")
+    parser.add_argument("--period", default=None, metavar="MMYYYY", help="GSTR-1 return period, e.g. 042025")
+    parser.add_argument("--eco-gstin", action="append", metavar="OPERATOR=GSTIN", help="e-commerce operator GSTIN; repeatable")
+    parser.add_argument("--eco-breakdown", action="append", choices=tuple(ECO_BREAKDOWNS), default=[],
+                        help="also write ECO TCS per operator and GST rate or place of supply; repeatable")
+    parser.add_argument("--engine", choices=("pandas",) + tuple(available_sql_engines()), default="pandas",
+                        help="merge in memory with pandas (default) or in an on-disk SQL database")
+    parser.add_argument("--profile", action="store_true",
+                        help="log per-stage timings as JSON lines on stderr and print a summary at the end")
+    return parser
+
+def process_directory(input_dir, business_state, chunksize=None, cache=None, workers=1, log=print, stages=None,
+                      global_data=None):
+    """Run every discovered file through its adapter; returns ``(global_data, errors)``.
+
+    ``chunksize=None`` streams only CSVs above the size threshold; ``0`` reads every file whole. Pass a list
+    as ``stages`` to profile the run; the per-stage records are appended to it. Results are merged into
+    ``global_data`` (e.g. a ``SQLMergedData``), by default a new in-memory one. Reconciliation mismatches are
+    logged once everything is merged.
+    """
+    global_data = global_data if global_data is not None else empty_global_data()
+    errors = []
+    items = list(discover_files(input_dir))
+    executor = make_executor(workers) if workers > 1 and len(items) > 1 else None
+    try:
+        outcomes = process_files(items, business_state, executor=executor, cache=cache, chunksize=chunksize,
+                                 progress=lambda done, total, o: log(f"[{done}/{total}] {o.platform}: {o.name}"),
+                                 profile=stages is not None)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    for outcome in outcomes:
+        if stages is not None:
+            stages.extend(outcome.stages)
+        if not outcome.ok:
+            errors.append(outcome.error); log(f"[{outcome.platform}] {outcome.error}")
+            continue
+        result = outcome.result
+        with capture(stages is not None, file=result.name, platform=outcome.platform) as records:
+            add_result(global_data, result)
+        emit(records)
+        if stages is not None:
+            stages.extend(records)
+        log(f"[{outcome.platform}] {result.name} (parsed in {result.parse_seconds:.2f}s, {result.reader})")
+        for note in result.messages():
+            log(f"[{outcome.platform}] {note}")
+    with capture(stages is not None, file="(reconciliation)") as records:
+        notes = reconciliation_notes(global_data.reconciliation())
+    emit(records)
+    if stages is not None:
+        stages.extend(records)
+    for note in notes:
+        log(f"[reconciliation] {note}")
+    return global_data, errors
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.state not in INDIAN_STATES_LIST:
+        parser.error(f"unknown state {args.state!r}")
+    try:
+        eco_gstins = _parse_gstins(args.eco_gstin)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if bool(args.gstin) != bool(args.period):
+        parser.error("--gstin and --period go together")
+    if args.gstin:
+        try:
+            validate_filing(args.gstin.strip().upper(), args.period)
+        except ValueError as e:
+            parser.error(str(e))
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a directory")
+
+    stages = [] if args.profile else None
+    if args.profile:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        profile_log = logging.getLogger("gstify.profile")
+        profile_log.addHandler(handler); profile_log.setLevel(logging.INFO)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    merged = empty_global_data() if args.engine == "pandas" else SQLMergedData(engine=args.engine)
+    try:
+        global_data, errors = process_directory(args.input_dir, args.state, args.chunksize, cache, args.workers, log=lambda msg: print(msg, file=sys.stderr), stages=stages, global_data=merged)
+        with capture(args.profile, file="(reports)") as records:
+            paths = write_outputs(global_data, eco_gstins, args.output_dir, args.csv, args.zip, args.gstin, args.period,
+                                  args.eco_breakdown)
+    except ValueError as e:
+        print(f"GSTR-1 JSON: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.engine != "pandas":
+            merged.close()
+    emit(records)
+    for path in paths:
+        print(path)
+    if args.profile:
+        print_profile(stages + records)
+    return 1 if errors else 0
+
+def write_outputs(global_data, eco_gstins, output_dir, csv=False, bundle=False, gstin=None, period=None,
+                  eco_breakdowns=()):
+    """Write the report set (and the GSTR-1 JSON when ``gstin`` is given) to ``output_dir``; returns the paths."""
+    reports = build_reports(global_data, eco_gstins)
+    names = {key: base for key, _, base in REPORTS}
+    formats = ("xlsx", "csv") if csv else ("xlsx",)
+    documents = {}
+    if gstin:
+        documents[gstr1_filename(gstin, period)] = build_gstr1(reports, gstin, period, b2b_lines(global_data))
+    for by in dict.fromkeys(eco_breakdowns):
+        reports[f"eco_tcs_{by}"], names[f"eco_tcs_{by}"] = global_data.eco_tcs(eco_gstins, by), f"ECO_TCS_by_{by}"
+    if bundle:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, "GSTify_reports.zip")
+        write_bundle(reports, path, names, formats, documents)
+        return [path]
+    written = write_reports(reports, output_dir, names, formats)
+    for name, doc in documents.items():
+        path = os.path.join(output_dir, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=1)
+        written.append(path)
+    return written
+
+def print_profile(records, out=sys.stderr):
+    """Per-stage totals, slowest first."""
+    rows = sorted(summarise(records), key=lambda r: r["seconds"], reverse=True)
+    print(f"{'stage':<18} {'file':<32} {'calls':>5} {'seconds':>9} {'self':>9} {'rows in':>10} {'rows out':>10} {'peak MB':>8}", file=out)
+    for r in rows:
+        # No peak when the capture ran without memory tracking.
+        peak = "-" if r["peak_bytes"] is None else f"{r['peak_bytes'] / 2**20:.1f}"
+        print(f"{r['stage']:<18} {r['file'][:32]:<32} {r['calls']:>5} {r['seconds']:>9.3f} {r['self_seconds']:>9.3f} "
+              f"{r['rows_in']:>10} {r['rows_out']:>10} {peak:>8}", file=out)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# ------------------------------
+# State tables
+# ------------------------------
+STATE_NAME_MAPPING = {
+    'Andaman & Nicobar Islands': '35-Andaman & Nicobar Islands',
+    'Andaman And Nicobar Islands': '35-Andaman & Nicobar Islands',
+    'Andaman and Nicobar Islands': '35-Andaman & Nicobar Islands',
+    'Andhra Pradesh': '37-Andhra Pradesh',
+    'Arunachal Pradesh': '12-Arunachal Pradesh',
+    'Assam': '18-Assam',
+    'Bihar': '10-Bihar',
+    'Chandigarh': '04-Chandigarh',
+    'Chattisgarh': '22-Chhattisgarh',
+    'Chhattisgarh': '22-Chhattisgarh',
+    'Dadra & Nagar Haveli': '26-Dadra & Nagar Haveli',
+    'Dadra And Nagar Haveli And Daman And Diu': '26-Dadra & Nagar Haveli',
+    'The Dadra And Nagar Haveli': '26-Dadra & Nagar Haveli',
+    'Dadra And Nagar Haveli': '26-Dadra & Nagar Haveli',
+    'Daman And Diu': '25-Daman & Diu',
+    'Daman & Diu': '25-Daman & Diu',
+    'Daman and Diu': '25-Daman & Diu',
+    'Delhi': '07-Delhi',
+    'New Delhi': '07-Delhi',
+    'Foreign Country': '96-Foreign Country',
+    'Goa': '30-Goa',
+    'Gujarat': '24-Gujarat',
+    'Haryana': '06-Haryana',
+    'Himachal Pradesh': '02-Himachal Pradesh',
+    'Jammu & Kashmir': '01-Jammu & Kashmir',
+    'Jammu And Kashmir': '01-Jammu & Kashmir',
+    'Jammu and Kashmir': '01-Jammu & Kashmir',
+    'Jharkhand': '20-Jharkhand',
+    'Karnataka': '29-Karnataka',
+    'Kerala': '32-Kerala',
+    'Ladakh': '38-Ladakh',
+    'Lakshdweep': '31-Lakshdweep',
+    'Madhya Pradesh': '23-Madhya Pradesh',
+    'Maharashtra': '27-Maharashtra',
+    'Manipur': '14-Manipur',
+    'Meghalaya': '17-Meghalaya',
+    'Mizoram': '15-Mizoram',
+    'Nagaland': '13-Nagaland',
+    'Odisha': '21-Odisha',
+    'Other Territory': '97-Other Territory',
+    'Puducherry': '34-Puducherry',
+    'Pondicherry': '34-Puducherry',
+    'Punjab': '03-Punjab',
+    'Rajasthan': '08-Rajasthan',
+    'Sikkim': '11-Sikkim',
+    'Tamil Nadu': '33-Tamil Nadu',
+    'Telangana': '36-Telangana',
+    'Tripura': '16-Tripura',
+    'Uttar Pradesh': '09-Uttar Pradesh',
+    'Uttarakhand': '05-Uttarakhand',
+    'West Bengal': '19-West Bengal'
+}
+
+# Spellings seen in uploads that are not keys of STATE_NAME_MAPPING. Case, spacing and "&"/"and" differences
+# need no entry here; the state index in ``states`` ignores them.
+STATE_ALIASES = {
+    'Lakshadweep': '31-Lakshdweep',
+    'Orissa': '21-Odisha',
+    'Uttaranchal': '05-Uttarakhand',
+    'Telengana': '36-Telangana',
+    'Andaman & Nicobar': '35-Andaman & Nicobar Islands',
+    'NCT of Delhi': '07-Delhi',
+}
+
+INDIAN_STATES_LIST = [
+    'Andaman And Nicobar Islands', 'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar',
+    'Chandigarh', 'Chhattisgarh', 'Dadra And Nagar Haveli And Daman And Diu', 'Delhi', 'Goa',
+    'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jammu And Kashmir', 'Jharkhand', 'Karnataka',
+    'Kerala', 'Ladakh', 'Lakshadweep', 'Madhya Pradesh', 'Maharashtra', 'Manipur',
+    'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Other Territory', 'Puducherry',
+    'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura',
+    'Uttar Pradesh', 'Uttarakhand', 'West Bengal'
+]
+
+# Legal GST rate slabs in percent; 40 is the slab added in September 2025.
+GST_SLABS = (0, 0.25, 3, 5, 12, 18, 28, 40)
+
+# ------------------------------
+# Report layouts
+# ------------------------------
+B2CS_GROUP = ['State', 'GST Rate']
+HSN_GROUP = ['HSN', 'GST Rate']
+HSN_COLUMNS = ['HSN','GST Rate','Quantity','Invoice Amount','Taxable Value','IGST','CGST','SGST']
+HSN_SUMS = ['Quantity','Invoice Amount','Taxable Value','IGST','CGST','SGST']
+
+B2B_COLUMNS = ['GSTIN/UIN of Recipient','Receiver Name','Invoice Number','Invoice Date','Invoice Value','Place Of Supply','Reverse Charge','Applicable % of Tax Rate','Invoice Type','E-Commerce GSTIN','Rate','Taxable Value','Cess Amount']
+HSN_B2B_COLUMNS = ['HSN','Description','UQC','Total Quantity','Total Value','Taxable Value','Integrated Tax Amount','Central Tax Amount','State/UT Tax Amount','Cess Amount','Rate']
+
+B2CS_EXPORT_COLUMNS = ['Type','Place Of Supply','Rate','Applicable % of Tax Rate','Taxable Value','Cess Amount','E-Commerce GSTIN']
+HSN_EXPORT_COLUMNS = ['HSN','Description','UQC','Total Quantity','Total Value','Taxable Value','Integrated Tax Amount','Central Tax Amount','State/UT Tax Amount','Cess amount','Rate']
+HSN_EXPORT_NUMERIC = ['Total Quantity','Total Value','Taxable Value','Integrated Tax Amount','Central Tax Amount','State/UT Tax Amount','Rate']
+ECO_TCS_COLUMNS = ['Nature of Supply','GSTIN of E-Commerce Operator','E-Commerce Operator Name','Net value of supplies','Integrated tax','Central tax','State/UT tax','Cess']
+
+ECO_OPERATORS = ["Amazon","Flipkart","Jiomart","Meesho","Glowroad"]
+# Source_Platform -> the operator that collects TCS on it; Meesho returns are stored negated and net off its sales.
+ECO_PLATFORMS = {"Amazon": "Amazon", "Amazon_B2B": "Amazon", "Flipkart": "Flipkart", "Jiomart": "Jiomart",
+                 "Meesho_Sales": "Meesho", "Meesho_Return": "Meesho", "Glowroad": "Glowroad"}
+# Source_Platform of the B2B uploads whose 'Invoice Value' is one line's amount, added up per invoice; the other
+# B2B uploads repeat the invoice total on every line of the invoice.
+PER_LINE_INVOICE_VALUE = ("Amazon_B2B",)
@@ -0,0 +1,115 @@
+"""Report file writers.
+
+Workbooks are written with openpyxl in write-only mode: rows are streamed to the sheet in blocks instead of
+building every cell in memory first, so memory stays flat however many invoices a report has. The header is
+styled the way ``DataFrame.to_excel`` styles it and columns keep the order of the report frame.
+"""
+import json
+import os
+import time
+import zipfile
+from io import BytesIO, TextIOWrapper
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from .profiling import profiled, stage
+
+ROWS_PER_BLOCK = 50_000
+EXPORT_FORMATS = ("xlsx", "csv")
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+}
+
+_THIN = Side(style="thin")
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def _header(ws, columns):
+    row = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=str(name))
+        cell.font, cell.border, cell.alignment = _HEADER_FONT, _HEADER_BORDER, _HEADER_ALIGNMENT
+        row.append(cell)
+    return row
+
+@profiled("write_xlsx")
+def write_excel(df, target, sheet_name="Sheet1"):
+    """Stream ``df`` to an .xlsx path or binary file object without the index; blanks for missing values."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append(_header(ws, df.columns))
+    for start in range(0, len(df), ROWS_PER_BLOCK):
+        block = df.iloc[start:start + ROWS_PER_BLOCK]
+        block = block.astype(object).where(block.notna(), None)
+        for row in block.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(target)
+
+@profiled("write_csv")
+def write_csv(df, target):
+    df.to_csv(target, index=False)
+
+def to_excel_bytes(df, sheet_name="Sheet1"):
+    output = BytesIO()
+    write_excel(df, output, sheet_name=sheet_name)
+    return output.getvalue()
+
+@profiled("write_csv")
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+def to_bytes(df, fmt="xlsx", sheet_name="Sheet1"):
+    return to_excel_bytes(df, sheet_name=sheet_name) if fmt == "xlsx" else to_csv_bytes(df)
+
+def _zip_entry(name, compression):
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = compression
+    return info
+
+def write_bundle(reports, target, names, formats=("xlsx",), documents=None):
+    """Write every non-empty report, plus ``documents`` (``{file name: JSON-able object}``), into one ZIP.
+
+    Each file is streamed straight into its archive entry, so no report is held as separate bytes on the way.
+    Workbooks are stored as they are (they are already compressed); CSV and JSON entries are deflated.
+    """
+    with stage("write_zip", sum(len(df) for df in reports.values())), zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for key, df in reports.items():
+            if df.empty:
+                continue
+            for fmt in formats:
+                compression = zipfile.ZIP_STORED if fmt == "xlsx" else zipfile.ZIP_DEFLATED
+                with zf.open(_zip_entry(f"{names[key]}.{fmt}", compression), "w", force_zip64=True) as fh:
+                    if fmt == "xlsx":
+                        write_excel(df, fh)
+                    else:
+                        with TextIOWrapper(fh, encoding="utf-8", newline="") as text:
+                            write_csv(df, text)
+        for name, doc in (documents or {}).items():
+            with zf.open(_zip_entry(name, zipfile.ZIP_DEFLATED), "w") as fh, TextIOWrapper(fh, encoding="utf-8") as text:
+                json.dump(doc, text, indent=1)
+
+def to_zip_bytes(reports, names, formats=("xlsx",), documents=None):
+    output = BytesIO()
+    write_bundle(reports, output, names, formats, documents)
+    return output.getvalue()
+
+def write_reports(reports, out_dir, names, formats=("xlsx",)):
+    """Write each non-empty report to ``out_dir/<name>.<fmt>`` for every format; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for key, df in reports.items():
+        if df.empty:
+            continue
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{names[key]}.{fmt}")
+            if fmt == "xlsx":
+                write_excel(df, path)
+            else:
+                write_csv(df, path)
+            written.append(path)
+    return written
@@ -0,0 +1,45 @@
+"""Frame helpers shared by the adapters and the merged views."""
+import pandas as pd
+
+
+def concat_frames(frames):
+    """``pd.concat`` that keeps categorical columns categorical even when the frames' categories differ.
+
+    Categories are unioned and sorted, so grouping on the result orders keys the same way strings would.
+    """
+    frames = list(frames)
+    if len(frames) > 1:
+        for col in frames[0].columns:
+            dtypes = [f[col].dtype if col in f.columns else None for f in frames]
+            if not all(isinstance(d, pd.CategoricalDtype) for d in dtypes) or len(set(dtypes)) == 1:
+                continue
+            dtype = pd.CategoricalDtype(sorted(set().union(*(d.categories for d in dtypes))))
+            aligned = []
+            for f in frames:
+                if f[col].dtype != dtype:
+                    f = f.copy(deep=False)
+                    f[col] = f[col].cat.set_categories(dtype.categories)
+                aligned.append(f)
+            frames = aligned
+    return pd.concat(frames, ignore_index=True)
+
+# Key columns are always stored as categoricals; other text columns only when values repeat enough to pay off.
+CATEGORY_COLUMNS = ('State', 'Place Of Supply', 'HSN', 'Source_Platform')
+
+def compact_frame(df):
+    """The same rows with repeated text as categoricals and integers in the narrowest type that holds them.
+
+    Money columns stay float64: float32 cannot hold rupee totals to the paisa.
+    """
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_integer_dtype(s.dtype):
+            s = pd.to_numeric(s, downcast="integer")
+        elif s.dtype == object and (col in CATEGORY_COLUMNS or s.nunique(dropna=False) <= len(s) // 2):
+            s = s.astype("category")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from .constants import GST_SLABS
+from .profiling import profiled
+from .states import normalise_states
+
+
+def custom_round_gst_rate(rate):
+    if pd.isna(rate):
+        return 0
+    try:
+        rate = float(rate)
+        return int(np.floor(rate + 0.5))
+    except (ValueError, TypeError):
+        return 0
+
+@profiled("round_rates")
+def round_gst_rates(rates):
+    """``custom_round_gst_rate`` for a whole column: half-up to a whole percent, unreadable values becoming 0."""
+    values = np.asarray(pd.to_numeric(rates, errors='coerce'), dtype=float)
+    values = np.where(np.isfinite(values), values, 0.0)
+    return pd.Series(np.floor(values + 0.5).astype(np.int64), index=getattr(rates, 'index', None))
+
+def off_slab_counts(rates):
+    """``{rate: rows}`` for the rounded rates in ``rates`` that are not a legal GST slab."""
+    rates = pd.Series(rates)
+    off = rates[~rates.isin(GST_SLABS)]
+    return {int(rate): int(rows) for rate, rows in off.value_counts().sort_index().items()}
+
+def intra_state_mask(states, user_state):
+    return (normalise_states(states) == user_state).to_numpy()
+
+@profiled("tax_split")
+def split_gst(taxable, rate, states=None, user_state=""):
+    taxable = pd.to_numeric(taxable, errors='coerce').fillna(0)
+    rate = pd.to_numeric(rate, errors='coerce').fillna(0)
+    tax = (taxable * (rate / 100)).fillna(0)
+    if states is not None and user_state:
+        intra = intra_state_mask(states, user_state)
+        igst = pd.Series(np.where(intra, 0.0, tax), index=tax.index)
+        cgst = pd.Series(np.where(intra, tax / 2, 0.0), index=tax.index)
+    else:
+        igst = tax
+        cgst = pd.Series(0, index=tax.index)
+    return taxable, rate, igst, cgst, cgst.copy()
+
+def calculate_gst_amounts(df, taxable_value_col, gst_rate_col, state_col_for_igst_cgst_sgst=None, user_state=""):
+    """Add IGST/CGST/SGST columns; ``user_state`` is the mapped business state, e.g. ``23-Madhya Pradesh``."""
+    states = df[state_col_for_igst_cgst_sgst] if state_col_for_igst_cgst_sgst else None
+    taxable, rate, igst, cgst, sgst = split_gst(df[taxable_value_col], df[gst_rate_col], states, user_state)
+    return df.assign(**{taxable_value_col: taxable, gst_rate_col: rate, 'IGST': igst, 'CGST': cgst, 'SGST': sgst})
+
+INVOICE_DATE_FORMAT = '%d-%b-%Y'
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+# Layouts tried in bulk, in order. Slashed and dashed all-digit dates are month-first, which is what pandas'
+# own parsing picks for them; anything that matches none of these is parsed one value at a time.
+INVOICE_DATE_LAYOUTS = ('%d-%b-%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d %b %Y', '%m/%d/%Y', '%m-%d-%Y')
+
+def format_invoice_date(val):
+    try:
+        if isinstance(val, (int, float)):
+            return pd.to_datetime(val, unit='D', origin=EXCEL_EPOCH).strftime(INVOICE_DATE_FORMAT)
+        return pd.to_datetime(val).strftime(INVOICE_DATE_FORMAT)
+    except Exception:
+        return pd.NA
+
+def _formatted(dates):
+    return np.asarray(dates.strftime(INVOICE_DATE_FORMAT).astype(object).where(dates.notna(), pd.NA), dtype=object)
+
+@profiled("parse_dates")
+def parse_invoice_dates(values):
+    """``values.apply(format_invoice_date)`` in bulk; returns ``(dates, unparsed)`` with ``unparsed`` a row mask.
+
+    Each distinct value is parsed once: Excel serial numbers together, strings layout by layout (see
+    ``INVOICE_DATE_LAYOUTS``), and only what is left one by one through ``format_invoice_date``.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        dates = pd.Series(_formatted(pd.DatetimeIndex(values)), index=values.index, dtype=object)
+        return dates, dates.isna().to_numpy()
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    parsed = np.full(len(uniques), pd.NA, dtype=object)
+    numeric = np.fromiter((isinstance(v, (int, float)) for v in uniques), dtype=bool, count=len(uniques))
+    if numeric.any():
+        serials = pd.to_datetime(uniques[numeric].astype(float), unit='D', origin=EXCEL_EPOCH, errors='coerce')
+        parsed[numeric] = _formatted(serials)
+    pending = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+    leftover = ~numeric & ~pending
+    for layout in INVOICE_DATE_LAYOUTS:
+        if not pending.any():
+            break
+        idx = np.flatnonzero(pending)
+        dates = pd.DatetimeIndex(pd.to_datetime(uniques[idx], format=layout, errors='coerce'))
+        ok = dates.notna()
+        parsed[idx[ok]] = _formatted(dates[ok])
+        pending[idx[ok]] = False
+    for i in np.flatnonzero(leftover | pending):
+        parsed[i] = format_invoice_date(uniques[i])
+    result = np.where(codes >= 0, parsed[codes], pd.NA) if len(uniques) else np.full(len(codes), pd.NA, dtype=object)
+    dates = pd.Series(result, index=values.index, dtype=object)
+    return dates, dates.isna().to_numpy()
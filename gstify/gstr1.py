@@ -0,0 +1,133 @@
+"""GSTR-1 JSON in the layout the GST portal's offline tool imports.
+
+Only the tables GSTify produces are filled: ``b2b``, ``b2cs``, ``hsn`` (split into its B2B and B2C parts) and
+``supeco`` (TCS collected by e-commerce operators). Tax amounts are worked out from the rate and whether the place
+of supply differs from the seller's state, which is read from the first two digits of the GSTIN. A place of
+supply that is not a known state raises ``ValueError`` instead of producing a return the portal would reject.
+"""
+import re
+from itertools import groupby
+
+import pandas as pd
+
+from .constants import PER_LINE_INVOICE_VALUE
+from .states import UNMAPPED_PREFIX, normalise_states, unmapped_states
+
+GSTIN_PATTERN = re.compile(r"^\d{2}[A-Z0-9]{13}$")
+PERIOD_PATTERN = re.compile(r"^(0[1-9]|1[0-2])\d{4}$")
+
+
+def validate_filing(gstin, period):
+    """Raise ``ValueError`` unless ``gstin`` looks like a GSTIN and ``period`` is ``MMYYYY``."""
+    if not GSTIN_PATTERN.match(gstin or ""):
+        raise ValueError(f"invalid GSTIN {gstin!r}")
+    if not PERIOD_PATTERN.match(period or ""):
+        raise ValueError(f"invalid return period {period!r}; expected MMYYYY")
+
+def _state_codes(pos, table):
+    """The two-digit state code of each place of supply; ``ValueError`` names any that are not a known state."""
+    states = normalise_states(pos)
+    unmapped = unmapped_states(states)
+    if unmapped.any():
+        names = ", ".join(sorted(set(states[unmapped].astype(str).str.removeprefix(UNMAPPED_PREFIX))))
+        raise ValueError(f"unmapped place of supply in {table}: {names}")
+    return states.map(lambda code: code.split("-", 1)[0]).astype(str)
+
+def _with_taxes(df, state_code, table):
+    pos = _state_codes(df["Place Of Supply"], table)
+    inter = pos != state_code
+    full = (df["Taxable Value"] * df["Rate"] / 100).round(2)
+    half = (df["Taxable Value"] * df["Rate"] / 200).round(2)
+    return df.assign(pos=pos, iamt=full.where(inter, 0.0), camt=half.where(~inter, 0.0),
+                     samt=half.where(~inter, 0.0), inter=inter)
+
+def _amount(x):
+    return round(float(x), 2)
+
+def _rate(x):
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+INVOICE_KEYS = {"GSTIN/UIN of Recipient": "ctin", "Invoice Number": "inum", "idt": "idt"}
+
+def _invoices(df):
+    """One row per invoice of ``df``, by its ``inv`` number, with its value, place of supply and reverse charge.
+
+    Lines from a ``PER_LINE_INVOICE_VALUE`` upload are added up; the others repeat the total, taken once.
+    """
+    values = pd.to_numeric(df["Invoice Value"], errors="coerce")
+    per_line = df.get("Source_Platform", pd.Series("", index=df.index)).isin(PER_LINE_INVOICE_VALUE)
+    inv = df.assign(line_val=values.where(per_line), total_val=values.where(~per_line)).groupby("inv").agg(
+        **{v: (k, "first") for k, v in INVOICE_KEYS.items()}, line_val=("line_val", "sum"),
+        total_val=("total_val", "first"), pos=("pos", "first"), rchrg=("Reverse Charge", "first"))
+    return inv.assign(val=inv["line_val"] + inv["total_val"].fillna(0.0))
+
+def _b2b(b2b, state_code):
+    if b2b.empty:
+        return []
+    df = _with_taxes(b2b, state_code, "b2b")
+    df["idt"] = pd.to_datetime(df["Invoice Date"], format="%d-%b-%Y", errors="coerce").dt.strftime("%d-%m-%Y")
+    df["inv"] = df.groupby(list(INVOICE_KEYS), sort=False, dropna=False, observed=True).ngroup()
+    # Sorted by invoice, then rate, so each invoice's items are one run of rows.
+    items = df.groupby(["inv", "Rate"], sort=True, observed=True)[
+        ["Taxable Value", "iamt", "camt", "samt", "Cess Amount"]].sum().reset_index()
+    items = items.rename(columns={"Taxable Value": "txval", "Cess Amount": "csamt"})
+    itms = {k: [{"num": i, "itm_det": {"rt": _rate(r.Rate), "txval": _amount(r.txval), "iamt": _amount(r.iamt),
+                                         "camt": _amount(r.camt), "samt": _amount(r.samt),
+                                         "csamt": _amount(r.csamt)}}
+                for i, r in enumerate(rows, start=1)]
+            for k, rows in groupby(items.itertuples(index=False), key=lambda r: r.inv)}
+    # Recipients in GSTIN order, each one's invoices in the order they first appear.
+    inv = _invoices(df).sort_values("ctin", kind="stable")
+    return [{"ctin": ctin, "inv": [{"inum": str(r.inum), "idt": r.idt if isinstance(r.idt, str) else "",
+                                    "val": _amount(r.val), "pos": r.pos, "rchrg": "Y" if r.rchrg == "Y" else "N",
+                                    "inv_typ": "R", "itms": itms.get(r.Index, [])} for r in rows]}
+            for ctin, rows in groupby(inv.itertuples(), key=lambda r: r.ctin)]
+
+def _b2cs(b2cs, state_code):
+    if b2cs.empty:
+        return []
+    df = _with_taxes(b2cs, state_code, "b2cs").rename(columns={"Taxable Value": "txval"})
+    return [{"sply_ty": "INTER" if r.inter else "INTRA", "pos": r.pos, "typ": "OE", "rt": _rate(r.Rate),
+             "txval": _amount(r.txval), "iamt": _amount(r.iamt), "camt": _amount(r.camt), "samt": _amount(r.samt),
+             "csamt": 0}
+            for r in df.itertuples(index=False)]
+
+def _hsn(hsn):
+    if hsn.empty:
+        return []
+    return [{"num": i, "hsn_sc": str(r["HSN"]), "desc": str(r["Description"]), "uqc": str(r["UQC"]).split("-")[0],
+             "qty": _amount(r["Total Quantity"]), "rt": _rate(r["Rate"]), "txval": _amount(r["Taxable Value"]),
+             "iamt": _amount(r["Integrated Tax Amount"]), "camt": _amount(r["Central Tax Amount"]),
+             "samt": _amount(r["State/UT Tax Amount"]), "csamt": _amount(r["Cess amount"])}
+            for i, (_, r) in enumerate(hsn.iterrows(), start=1)]
+
+def _supeco(eco_tcs):
+    if eco_tcs.empty:
+        return []
+    return [{"etin": r["GSTIN of E-Commerce Operator"], "suppval": _amount(r["Net value of supplies"]),
+             "igst": _amount(r["Integrated tax"]), "cgst": _amount(r["Central tax"]),
+             "sgst": _amount(r["State/UT tax"]), "cess": _amount(r["Cess"])}
+            for _, r in eco_tcs.iterrows() if r["GSTIN of E-Commerce Operator"]]
+
+def build_gstr1(reports, gstin, period, b2b_lines=None):
+    """The GSTR-1 document for the report frames of ``build_reports``; ``period`` is ``MMYYYY``.
+
+    ``b2b_lines`` are the merged b2b rows with their ``Source_Platform`` (``reports.b2b_lines``), which tells how
+    to read each line's 'Invoice Value'; without them every line is taken to repeat its invoice's total.
+    """
+    gstin = (gstin or "").strip().upper()
+    validate_filing(gstin, period)
+    state_code = gstin[:2]
+    doc = {"gstin": gstin, "fp": period}
+    sections = {
+        "b2b": _b2b(reports["b2b"] if b2b_lines is None else b2b_lines, state_code),
+        "b2cs": _b2cs(reports["b2cs"], state_code),
+        "hsn": {"hsn_b2b": _hsn(reports["hsn_b2b"]), "hsn_b2c": _hsn(reports["hsn_sales"])},
+        "supeco": {"clttx": _supeco(reports["eco_tcs"])},
+    }
+    doc.update((k, v) for k, v in sections.items() if v and (not isinstance(v, dict) or any(v.values())))
+    return doc
+
+def gstr1_filename(gstin, period):
+    return f"GSTR1_{gstin.strip().upper()}_{period}.json"
@@ -0,0 +1,165 @@
+"""Index of the merged B2B invoice lines, for duplicate checks and lookups by recipient.
+
+A line's key is (recipient GSTIN, invoice number, invoice date, rate), with the text stripped (GSTIN and invoice
+number also upper-cased), hashed to one 64-bit number per row. The distinct keys are kept in a few pandas hash
+indexes of decreasing size: a file's new keys become the smallest, which is merged into the one before it while
+that is no larger, so each key is copied (and hashed) about log2(keys) times in all and a file's cost is per row of
+that file, not of everything already merged. Keys already seen in an earlier file are remembered for
+``duplicates``. Rows sharing a key within one file are lines of the same invoice (one per item on Amazon exports)
+and are never reported. The index holds positions into the merged per-file b2b frames, not the rows themselves;
+reports compare the actual key values, so a hash collision cannot show up in them.
+"""
+import numpy as np
+import pandas as pd
+
+from .constants import B2B_COLUMNS
+
+INVOICE_KEY = ['GSTIN/UIN of Recipient', 'Invoice Number', 'Invoice Date', 'Rate']
+DUPLICATE_COLUMNS = INVOICE_KEY + ['Status', 'Source_File', 'Lines', 'Taxable Value', 'Invoice Value']
+# Key columns compared case-insensitively; invoice dates are already in one layout (``INVOICE_DATE_FORMAT``).
+UPPER_KEY_COLUMNS = ('GSTIN/UIN of Recipient', 'Invoice Number')
+_MULT = np.uint64(1000003)
+
+
+def _text_codes(s, upper=True):
+    """``(codes, labels)`` of a text column with the labels stripped (and upper-cased); missing values get ``''``."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, labels = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, labels = pd.factorize(s)
+    labels = pd.Index(labels).astype(str).str.strip()
+    labels = (labels.str.upper() if upper else labels).to_numpy(object)
+    codes = np.asarray(codes, dtype=np.intp)
+    return np.where(codes < 0, len(labels), codes), np.append(labels, '')
+
+def _rates(s):
+    return pd.to_numeric(s, errors='coerce').round(2).to_numpy(dtype=float) + 0.0
+
+def invoice_hashes(df):
+    """One uint64 per row of a b2b frame, equal for rows with the same ``INVOICE_KEY``."""
+    out = np.zeros(len(df), dtype=np.uint64)
+    for col in INVOICE_KEY[:3]:
+        codes, labels = _text_codes(df[col], col in UPPER_KEY_COLUMNS)
+        out = (out * _MULT) ^ pd.util.hash_array(labels)[codes]
+    return (out * _MULT) ^ pd.util.hash_array(_rates(df['Rate']))
+
+def invoice_keys(df):
+    """The ``INVOICE_KEY`` columns of a b2b frame as compared: plain stripped text, rates rounded."""
+    out = {}
+    for col in INVOICE_KEY[:3]:
+        codes, labels = _text_codes(df[col], col in UPPER_KEY_COLUMNS)
+        out[col] = labels[codes]
+    out['Rate'] = _rates(df['Rate'])
+    return pd.DataFrame(out, index=df.index)
+
+def duplicates_report(per_file):
+    """The B2B duplicates report from per-file sums: one row per invoice line and file, for lines found in more
+    than one file. ``per_file`` has ``INVOICE_KEY``, ``_file`` (merge order), ``Source_File``, ``Lines``,
+    ``Taxable Value`` and ``Invoice Value``. Copies that agree to the paisa are a ``duplicate``, others a ``conflict``.
+    """
+    if per_file.empty:
+        return pd.DataFrame()
+    out = per_file[per_file.groupby(INVOICE_KEY)['_file'].transform('size') > 1].copy()
+    if out.empty:
+        return pd.DataFrame()
+    out[['Taxable Value', 'Invoice Value']] = out[['Taxable Value', 'Invoice Value']].astype(float).round(2)
+    out['Rate'] = out['Rate'].astype(float)
+    grouped = out.groupby(INVOICE_KEY)
+    differs = (grouped['Taxable Value'].transform('nunique') > 1) | (grouped['Invoice Value'].transform('nunique') > 1)
+    out['Status'] = np.where(differs, 'conflict', 'duplicate')
+    out['Source_File'] = out['Source_File'].astype(str)
+    return out.sort_values(INVOICE_KEY + ['_file'], kind='stable')[DUPLICATE_COLUMNS].reset_index(drop=True)
+
+def invoice_rows(df):
+    """b2b rows in the B2B output layout, with the file each came from."""
+    df = df.copy()
+    for c in B2B_COLUMNS + ['Source_File']:
+        if c not in df.columns: df[c] = ""
+    return df[B2B_COLUMNS + ['Source_File']].reset_index(drop=True)
+
+class InvoiceIndex:
+    """Keys of the b2b frames added so far, in order (see the module docstring)."""
+
+    def __init__(self):
+        self.files = 0
+        self._hashes = []   # per frame: key hash per row
+        self._levels = []   # distinct keys seen, as indexes of decreasing size
+        self._repeated = []   # per frame: its keys already seen in an earlier frame
+        self._by_gstin = {}   # recipient GSTIN -> ((frame, row positions), ...)
+
+    def copy(self):
+        """An index to add to while this one stays as it is; the arrays are shared, as they are never modified."""
+        other = InvoiceIndex()
+        other.files, other._levels = self.files, list(self._levels)
+        other._hashes, other._repeated, other._by_gstin = list(self._hashes), list(self._repeated), dict(self._by_gstin)
+        return other
+
+    def memory_bytes(self):
+        arrays = self._hashes + self._repeated + [pos for entries in self._by_gstin.values() for _, pos in entries]
+        return sum(a.nbytes for a in arrays) + sum(level.nbytes for level in self._levels)
+
+    def _seen(self, keys):
+        seen = np.zeros(len(keys), dtype=bool)
+        for level in self._levels:
+            seen |= level.get_indexer(keys) >= 0
+        return seen
+
+    def _insert(self, keys):
+        level = pd.Index(keys)
+        while self._levels and len(self._levels[-1]) <= len(level):
+            level = self._levels.pop().append(level)
+        if len(level):
+            self._levels.append(level)
+
+    def add(self, df):
+        """Index the next b2b frame; returns how many of its invoice lines are already in earlier frames."""
+        hashes = invoice_hashes(df)
+        keys = pd.unique(hashes)
+        seen = self._seen(keys)
+        self._insert(keys[~seen])
+        codes, labels = _text_codes(df['GSTIN/UIN of Recipient'])
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        for gstin, pos in zip(labels, np.split(order, np.cumsum(np.bincount(codes, minlength=len(labels)))[:-1])):
+            if len(pos):
+                self._by_gstin[gstin] = self._by_gstin.get(gstin, ()) + ((self.files, pos),)
+        self._hashes.append(hashes)
+        self._repeated.append(keys[seen])
+        self.files += 1
+        return int(seen.sum())
+
+    def duplicates(self, frames):
+        """``duplicates_report`` for ``frames``, the b2b frames this index was built from."""
+        repeated = pd.Index(np.unique(np.concatenate(self._repeated))) if self._repeated else None
+        if repeated is None or repeated.empty:
+            return pd.DataFrame()
+        parts = []
+        for i, (df, hashes) in enumerate(zip(frames, self._hashes)):
+            rows = df.iloc[np.flatnonzero(repeated.get_indexer(hashes) >= 0)]
+            if rows.empty:
+                continue
+            part = invoice_keys(rows)
+            part['_file'] = i
+            part['Source_File'] = rows['Source_File'].astype(str) if 'Source_File' in rows.columns else ''
+            part['Taxable Value'] = pd.to_numeric(rows['Taxable Value'], errors='coerce')
+            part['Invoice Value'] = pd.to_numeric(rows['Invoice Value'], errors='coerce')
+            parts.append(part)
+        if not parts:
+            return pd.DataFrame()
+        per_file = (pd.concat(parts, ignore_index=True)
+                    .groupby(INVOICE_KEY + ['_file'], as_index=False, sort=False)
+                    .agg(Source_File=('Source_File', 'first'), Lines=('_file', 'size'),
+                         **{'Taxable Value': ('Taxable Value', 'sum'), 'Invoice Value': ('Invoice Value', 'max')}))
+        return duplicates_report(per_file)
+
+    def lookup(self, frames, gstin):
+        """Every b2b row for recipient ``gstin``, in upload order (see ``invoice_rows``)."""
+        entries = self._by_gstin.get(str(gstin).strip().upper(), ())
+        if not entries:
+            return pd.DataFrame()
+        # Gathered column by column as plain values: per-frame DataFrame work would cost more than the lookup.
+        columns = {c: [] for c in B2B_COLUMNS + ['Source_File']}
+        for i, pos in entries:
+            df = frames[i]
+            for c, values in columns.items():
+                values.append(np.asarray(df[c].array.take(pos)) if c in df.columns else np.full(len(pos), "", dtype=object))
+        return pd.DataFrame({c: np.concatenate(values) for c, values in columns.items()})
@@ -0,0 +1,93 @@
+"""Background processing jobs for the web app.
+
+``JobManager.submit`` runs one batch of uploads on a small pool of job threads and returns at once; the files
+themselves are parsed on the process pool passed in, so a large job never holds up the Streamlit script threads
+of this or any other session. A job's ``done``/``rows`` counters move as each file finishes, and ``cancel``
+stops it starting further files (see ``process_files``). Finished jobs stay with their session until the app
+has folded their outcomes in and calls ``forget``; ones nobody collects are dropped after ``keep_seconds``.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .parallel import process_files
+from .readers import log
+
+DEFAULT_MAX_JOBS = 2
+DEFAULT_KEEP_SECONDS = 3600
+
+
+@dataclass
+class Job:
+    id: str
+    session_id: str
+    platform: str
+    total: int
+    digests: list = field(default_factory=list)   # content digests of the files, as given to ``submit``
+    status: str = "queued"   # then "running", and finally "done", "cancelled" or "failed"
+    done: int = 0            # files finished
+    rows: int = 0            # rows read from the finished files
+    outcomes: list = field(default_factory=list)
+    error: str = ""
+    submitted: float = field(default_factory=time.time)
+    finished: float = 0.0
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelling(self):
+        return self._cancel.is_set() and self.active
+
+class JobManager:
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, keep_seconds=DEFAULT_KEEP_SECONDS):
+        self.keep_seconds = keep_seconds
+        self._runner = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="gstify-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, platform, items, business_state, executor=None, digests=None, **options):
+        """Queue ``process_files(items, business_state, executor=executor, digests=digests, **options)`` as a job."""
+        job = Job(uuid.uuid4().hex, session_id, platform, total=len(items), digests=list(digests or []))
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        self._runner.submit(self._run, job, items, business_state, executor, options)
+        return job
+
+    def _run(self, job, items, business_state, executor, options):
+        def on_progress(done, total, outcome):
+            job.done = done
+            job.rows += outcome.result.rows_read if outcome.ok else 0
+
+        job.status = "running"
+        try:
+            job.outcomes = process_files(items, business_state, executor=executor, digests=job.digests or None,
+                                         progress=on_progress, cancelled=job._cancel.is_set, **options)
+            job.status = "cancelled" if job._cancel.is_set() else "done"
+        except Exception as e:
+            log.exception("job %s failed", job.id)
+            job.error, job.status = f"{type(e).__name__}: {e}", "failed"
+        job.finished = time.time()
+
+    def jobs(self, session_id):
+        """The session's jobs not yet forgotten, oldest first."""
+        with self._lock:
+            return sorted((j for j in self._jobs.values() if j.session_id == session_id), key=lambda j: j.submitted)
+
+    def forget(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    def _expire(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if not job.active and now - job.finished > self.keep_seconds:
+                del self._jobs[job_id]
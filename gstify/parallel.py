@@ -0,0 +1,139 @@
+"""Process many uploaded files at once on a worker pool.
+
+Each file is parsed and aggregated in a worker process; outcomes come back in submission order so merged
+reports do not depend on which worker finished first. A failing file is reported in its outcome and never
+aborts the rest of the batch.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .adapters import ADAPTERS, FileResult, NoRowsError, ProcessingError
+from .cache import ResultCache, content_digest
+from .pipeline import process_file
+from .profiling import capture, emit
+from .readers import source_name, stream_chunksize
+
+
+@dataclass
+class FileOutcome:
+    platform: str
+    name: str
+    digest: str
+    result: Optional[FileResult] = None
+    error: Optional[str] = None
+    level: str = "error"   # "warning" for files that simply had nothing to aggregate
+    stages: list = field(default_factory=list)   # profiling records, when asked for
+
+    @property
+    def ok(self):
+        return self.result is not None
+
+def default_workers():
+    return max(1, min(os.cpu_count() or 1, 8))
+
+def make_executor(workers=None):
+    # spawn rather than fork: the Streamlit server is multi-threaded and forking it is not safe.
+    return ProcessPoolExecutor(max_workers=workers or default_workers(), mp_context=multiprocessing.get_context("spawn"))
+
+def executor_usable(executor):
+    # A worker that died (e.g. killed for memory) leaves the pool permanently broken.
+    return not getattr(executor, "_broken", False)
+
+def _payload(src):
+    return src if isinstance(src, (str, os.PathLike)) else src.getvalue()
+
+def _run_one(platform, payload, name, digest, business_state, chunksize, cache_spec, profile=False):
+    with capture(profile, file=name, platform=platform) as records:
+        outcome = _process_one(platform, payload, name, digest, business_state, chunksize, cache_spec)
+    outcome.stages = records
+    return outcome
+
+def _process_one(platform, payload, name, digest, business_state, chunksize, cache_spec):
+    src = payload
+    if isinstance(payload, bytes):
+        src = io.BytesIO(payload); src.name = name
+    cache = ResultCache(*cache_spec) if cache_spec else None
+    try:
+        result = process_file(ADAPTERS[platform], src, business_state, name=name, chunksize=chunksize,
+                              cache=cache, digest=digest)
+    except NoRowsError as e:
+        return FileOutcome(platform, name, digest, error=str(e), level="warning")
+    except ProcessingError as e:
+        return FileOutcome(platform, name, digest, error=str(e))
+    except Exception as e:
+        return FileOutcome(platform, name, digest, error=f"{name}: {type(e).__name__}: {e}")
+    return FileOutcome(platform, name, digest, result=result)
+
+def process_files(items, business_state, executor=None, cache=None, chunksize=None, digests=None, progress=None,
+                  profile=False, cancelled=None, max_active=None):
+    """Process ``(platform, src)`` pairs; returns one ``FileOutcome`` per item, in the order given.
+
+    Without an ``executor`` files run one after another in this process. ``chunksize=None`` streams only
+    large CSVs (see ``stream_chunksize``). ``progress(done, total, outcome)`` is called as each file finishes.
+    With ``profile`` each outcome carries its per-stage records (see ``gstify.profiling``), also logged here.
+    Once ``cancelled()`` returns true no further file is started and every file not finished by then gets a
+    "cancelled" outcome; a worker already busy with one finishes it, but its result is dropped. ``max_active``
+    caps how many files are on the executor at once, so one batch cannot take all of a shared pool.
+    """
+    cache_spec = (cache.root, cache.max_bytes) if cache is not None and cache.enabled else None
+    jobs = []
+    for i, (platform, src) in enumerate(items):
+        digest = digests[i] if digests else content_digest(src)
+        rows = stream_chunksize(src) if chunksize is None else chunksize
+        jobs.append((platform, src, source_name(src), digest, rows))
+
+    outcomes = [None] * len(jobs)
+    stop = cancelled or (lambda: False)
+    if executor is None:
+        for i, (platform, src, name, digest, rows) in enumerate(jobs):
+            if stop():
+                break
+            outcomes[i] = _run_one(platform, src, name, digest, business_state, rows, cache_spec, profile)
+            emit(outcomes[i].stages)
+            if progress: progress(i + 1, len(jobs), outcomes[i])
+    else:
+        futures, queued = {}, iter(range(len(jobs)))
+
+        def submit_next():
+            for i in queued:
+                platform, src, name, digest, rows = jobs[i]
+                try:
+                    future = executor.submit(_run_one, platform, _payload(src), name, digest, business_state, rows,
+                                             cache_spec, profile)
+                except Exception as e:
+                    # The pool broke (a worker died) part-way through the batch; the file fails like one on it.
+                    outcomes[i] = FileOutcome(platform, name, digest, error=f"{name}: worker failed: {e}")
+                    continue
+                futures[future] = i
+                return {future}
+            return set()
+
+        pending, done = set(), 0
+        for _ in range(max_active or len(jobs)):
+            pending |= submit_next()
+        while pending and not stop():
+            # Woken at least once a second so a cancel is noticed while files are still running.
+            finished, pending = wait(pending, timeout=1.0 if cancelled else None, return_when=FIRST_COMPLETED)
+            for future in sorted(finished, key=futures.get):
+                if not stop():
+                    pending |= submit_next()
+                i = futures[future]
+                try:
+                    outcomes[i] = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. out of memory); report it against the file like any other failure.
+                    platform, _, name, digest, _ = jobs[i]
+                    outcomes[i] = FileOutcome(platform, name, digest, error=f"{name}: worker failed: {e}")
+                emit(outcomes[i].stages)
+                done += 1
+                if progress: progress(done, len(jobs), outcomes[i])
+        for future in pending:
+            future.cancel()
+    for i, (platform, _, name, digest, _) in enumerate(jobs):
+        if outcomes[i] is None:
+            outcomes[i] = FileOutcome(platform, name, digest, error=f"{name}: cancelled", level="warning")
+    return outcomes
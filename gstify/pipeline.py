@@ -0,0 +1,35 @@
+import time
+
+from .adapters import FileResult
+from .cache import cache_key, content_digest
+from .profiling import stage
+from .readers import source_name
+from .reports import prepare_result
+
+
+def process_file(adapter, src, business_state, name=None, chunksize=None, cache=None, digest=None):
+    """Process one file through ``adapter``, serving and filling ``cache`` (a ``ResultCache``) when given.
+
+    The returned result carries the file's content digest; ``result.cached`` tells whether it was a cache hit.
+    Its frames come back merge-ready (see ``prepare_result``), and are cached that way.
+    """
+    digest = digest or content_digest(src)
+    key = cache_key(digest, adapter.key, business_state)
+    if cache is not None:
+        start = time.perf_counter()
+        with stage("cache_read") as s:
+            hit = cache.get(key)
+            s.rows_out = sum(len(df) for df in hit[0].values()) if hit is not None else 0
+        if hit is not None:
+            frames, meta = hit
+            return FileResult(source_name(src, name), reader="cache", parse_seconds=time.perf_counter() - start,
+                              rows_read=meta.get("rows_read", 0), prepared=meta.get("prepared", False), digest=digest,
+                              cached=True, notes=meta.get("notes", []),
+                              off_slab={int(rate): n for rate, n in meta.get("off_slab", {}).items()}, **frames)
+    result = prepare_result(adapter.process(src, business_state, name=name, chunksize=chunksize))
+    result.digest = digest
+    if cache is not None:
+        with stage("cache_write", sum(len(df) for _, df in result.frames())):
+            cache.put(key, dict(result.frames()), platform=adapter.key, name=result.name, notes=result.notes,
+                      off_slab=result.off_slab, rows_read=result.rows_read, prepared=True)
+    return result
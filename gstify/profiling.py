@@ -0,0 +1,167 @@
+"""Opt-in per-stage instrumentation.
+
+Work is wrapped in named stages (``with stage("read") as s: ...`` or ``@profiled("tax_split")``). While a
+``capture`` is active on the current thread each stage records wall time, rows in and out and the peak memory
+allocated above its starting point (via ``tracemalloc``, which only runs during a capture); nested stages also
+get ``self_seconds``, their time minus that of the stages inside them. tracemalloc and its peak are per process,
+so a multi-threaded server should capture with ``memory=False`` (timings only) and leave memory to worker
+processes, the CLI and the benchmarks. Outside a capture a stage is one thread-local flag check. ``emit`` writes
+records as one JSON object per line on the ``gstify.profile`` logger.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+log = logging.getLogger("gstify.profile")
+
+
+class _State(threading.local):
+    enabled = False
+    memory = False
+
+    def __init__(self):
+        self.stack = []
+        self.records = []
+        self.labels = {}
+
+_state = _State()
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+class _Stage:
+    __slots__ = ("name", "rows_in", "rows_out", "start", "mem_start", "peak", "child_seconds")
+
+    def __init__(self, name, rows_in):
+        self.name, self.rows_in, self.rows_out = name, rows_in, None
+        self.child_seconds = 0.0
+
+class _Off:
+    """Stand-in yielded when profiling is off; setting ``rows_out`` on it does nothing."""
+    __slots__ = ("rows_in", "rows_out")
+
+_OFF = _Off()
+
+def enabled():
+    return _state.enabled
+
+def _rows(obj):
+    if isinstance(obj, tuple):
+        obj = obj[0] if obj else None
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def _fold_peak():
+    # tracemalloc keeps one peak per process; fold it into every open stage before it is reset.
+    current, peak = tracemalloc.get_traced_memory()
+    for open_stage in _state.stack:
+        open_stage.peak = max(open_stage.peak, peak)
+    return current
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Time the enclosed block as stage ``name``; set ``.rows_out`` on the yielded object to record output rows."""
+    if not _state.enabled:
+        yield _OFF
+        return
+    s = _Stage(name, rows_in)
+    memory = _state.memory
+    s.mem_start = s.peak = _fold_peak() if memory else 0
+    if memory:
+        tracemalloc.reset_peak()
+    _state.stack.append(s)
+    s.start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        seconds = time.perf_counter() - s.start
+        if memory:
+            _fold_peak()
+        _state.stack.pop()
+        if _state.stack:
+            _state.stack[-1].child_seconds += seconds
+        _state.records.append({
+            "stage": name, **_state.labels, "seconds": round(seconds, 6),
+            "self_seconds": round(seconds - s.child_seconds, 6), "rows_in": s.rows_in, "rows_out": s.rows_out,
+            "peak_bytes": max(s.peak - s.mem_start, 0) if memory else None,
+        })
+
+def profiled(name):
+    """Decorator form of ``stage``: rows in from the first argument, rows out from the return value (for a
+    function that returns nothing, such as a file writer, the rows it was given)."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            with stage(name, _rows(args[0]) if args else None) as s:
+                out = fn(*args, **kwargs)
+                s.rows_out = s.rows_in if out is None else _rows(out)
+            return out
+        return inner
+    return wrap
+
+@contextmanager
+def capture(on=True, memory=True, **labels):
+    """Record the stages run on this thread inside the block; yields the list the records are appended to.
+
+    ``labels`` (e.g. ``file=..., platform=...``) are added to every record. With ``on=False`` nothing is
+    recorded and the list stays empty; with ``memory=False`` tracemalloc is left alone and ``peak_bytes`` is None.
+    """
+    records = []
+    if not on:
+        yield records
+        return
+    saved = (_state.enabled, _state.memory, _state.stack, _state.records, _state.labels)
+    _state.enabled, _state.memory, _state.stack, _state.records = True, memory, [], records
+    _state.labels = {**_state.labels, **labels}
+    if memory:
+        _start_tracing()
+    try:
+        yield records
+    finally:
+        if memory:
+            _stop_tracing()
+        _state.enabled, _state.memory, _state.stack, _state.records, _state.labels = saved
+        if saved[0]:
+            saved[3].extend(records)
+
+def emit(records):
+    for record in records:
+        log.info(json.dumps(record, default=str))
+
+def summarise(records):
+    """Records grouped by stage (and file): ``[{stage, file, calls, seconds, self_seconds, rows_in, rows_out,
+    peak_bytes}]`` in order of first appearance, summing times and rows and keeping the largest peak (None when
+    no record had one)."""
+    out = {}
+    for r in records:
+        key = (r["stage"], r.get("file", ""))
+        row = out.setdefault(key, {"stage": r["stage"], "file": r.get("file", ""), "calls": 0, "seconds": 0.0,
+                                   "self_seconds": 0.0, "rows_in": 0, "rows_out": 0, "peak_bytes": None})
+        row["calls"] += 1
+        row["seconds"] += r["seconds"]; row["self_seconds"] += r["self_seconds"]
+        row["rows_in"] += r["rows_in"] or 0; row["rows_out"] += r["rows_out"] or 0
+        if r["peak_bytes"] is not None:
+            row["peak_bytes"] = max(row["peak_bytes"] or 0, r["peak_bytes"])
+    return list(out.values())
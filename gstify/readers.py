@@ -0,0 +1,163 @@
+import importlib.util
+import logging
+import os
+import time
+
+import pandas as pd
+
+from .profiling import stage
+
+log = logging.getLogger("gstify")
+
+# CSV uploads above this size are read in chunks and folded into running aggregates.
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+CSV_CHUNK_ROWS = 250_000
+
+# Excel engines in order of preference; calamine (Rust) is optional and several times faster than openpyxl.
+EXCEL_ENGINES = ("calamine", "openpyxl")
+_ENGINE_MODULES = {"calamine": "python_calamine", "openpyxl": "openpyxl"}
+
+
+def source_name(src, name=None):
+    if name:
+        return name
+    return os.path.basename(getattr(src, 'name', None) or str(src))
+
+def source_size(src):
+    size = getattr(src, 'size', None)
+    if size is not None:
+        return size
+    try:
+        return os.path.getsize(src)
+    except (OSError, TypeError):
+        return 0
+
+def stream_chunksize(src):
+    """Rows per chunk for ``src``, or ``None`` when it is small enough to read in one go."""
+    return CSV_CHUNK_ROWS if source_size(src) > STREAM_THRESHOLD_BYTES else None
+
+def _rewind(src):
+    if hasattr(src, 'seek'):
+        src.seek(0)
+
+# ------------------------------
+# Excel backends
+# ------------------------------
+def available_excel_engines():
+    return [e for e in EXCEL_ENGINES if importlib.util.find_spec(_ENGINE_MODULES[e]) is not None]
+
+def excel_engine():
+    """The engine to try first: ``$GSTIFY_EXCEL_ENGINE`` if set and installed, else the fastest installed."""
+    available = available_excel_engines()
+    wanted = os.environ.get("GSTIFY_EXCEL_ENGINE", "").strip().lower()
+    if wanted in available:
+        return wanted
+    return available[0] if available else None
+
+def _with_fallback(src, name, open_fn):
+    """Call ``open_fn(engine)`` with the preferred engine, retrying with pandas' default on failure."""
+    engine = excel_engine()
+    if engine is not None and engine != "openpyxl":
+        try:
+            return open_fn(engine), engine
+        except Exception as e:
+            log.warning("%s: %s engine failed (%s); falling back", name, engine, e)
+            _rewind(src)
+    # openpyxl cannot read legacy .xls; let pandas pick (xlrd) for those.
+    engine = None if name.lower().endswith(".xls") else "openpyxl"
+    return open_fn(engine), engine or "default"
+
+def read_sheets(src, sheets, name=None):
+    """Parse only the wanted sheets that exist; returns ``({sheet: df}, engine, seconds)``.
+
+    ``sheets`` maps each sheet name to extra ``parse`` options (``usecols``, ``dtype``).
+    """
+    name = source_name(src, name)
+    start = time.perf_counter()
+
+    def parse(engine):
+        with pd.ExcelFile(src, engine=engine) as xl:
+            return {sheet: xl.parse(sheet, **opts) for sheet, opts in sheets.items() if sheet in xl.sheet_names}
+
+    with stage("read") as s:
+        frames, engine = _with_fallback(src, name, parse)
+        s.rows_out = sum(len(df) for df in frames.values())
+    return frames, engine, time.perf_counter() - start
+
+def _first_row(rows):
+    # The first row with a value, without trailing blanks, converted as pandas' openpyxl reader does.
+    for row in rows:
+        cells = [None if v == "" else int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+        while cells and cells[-1] is None:
+            cells.pop()
+        if cells:
+            return cells
+    return []
+
+def _header_names(cells):
+    # pandas' names for a header row: blanks as ``Unnamed: i``, repeats as ``name.1``, ``name.2``... skipping
+    # any name already in the row.
+    names = [f"Unnamed: {i}" if v is None else v for i, v in enumerate(cells)]
+    counts = {}
+    for i, base in enumerate(names):
+        name, count = base, counts.get(base, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f"{base}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def _excel_header(src):
+    """Header names of the first sheet, streamed with openpyxl up to the header row only. Calamine (and so
+    ``read_excel(nrows=0)`` with it) loads the whole sheet before returning any row."""
+    import openpyxl
+    wb = openpyxl.load_workbook(src, read_only=True, data_only=True)
+    try:
+        return _header_names(_first_row(wb.worksheets[0].iter_rows(values_only=True)))
+    finally:
+        wb.close()
+
+# ------------------------------
+# Generic readers
+# ------------------------------
+def read_header(src, name=None):
+    """Column names from the header row only; the source is rewound for the full read."""
+    name = source_name(src, name)
+    if name.lower().endswith(".csv"):
+        columns = list(pd.read_csv(src, nrows=0).columns)
+    elif name.lower().endswith(".xls"):
+        columns = list(pd.read_excel(src, nrows=0).columns)
+    else:
+        try:
+            columns = _excel_header(src)
+        except Exception as e:
+            log.warning("%s: could not stream the header (%s); reading it with pandas", name, e)
+            _rewind(src)
+            columns, _ = _with_fallback(src, name, lambda engine: list(pd.read_excel(src, engine=engine, nrows=0).columns))
+    _rewind(src)
+    return columns
+
+def read_any(src, name=None, **opts):
+    """Read an uploaded file or a path; returns ``(df, name)``."""
+    df, name, _, _ = read_timed(src, name, **opts)
+    return df, name
+
+def read_timed(src, name=None, **opts):
+    """Like ``read_any`` but also returns the reader used and the parse time: ``(df, name, reader, seconds)``.
+
+    ``opts`` (``usecols``, ``dtype``) are passed to the pandas reader.
+    """
+    name = source_name(src, name)
+    start = time.perf_counter()
+    with stage("read") as s:
+        if name.lower().endswith(".csv"):
+            df, reader = pd.read_csv(src, **opts), "csv"
+        else:
+            df, reader = _with_fallback(src, name, lambda engine: pd.read_excel(src, engine=engine, **opts))
+        s.rows_out = len(df)
+    return df, name, reader, time.perf_counter() - start
+
+def read_csv_chunks(src, chunksize, **opts):
+    return pd.read_csv(src, chunksize=chunksize, **opts)
@@ -0,0 +1,67 @@
+"""Cross-checks between the GSTR-1 tables built from the same files.
+
+The taxable value in B2CS must equal the HSN (Sales) summary, and that of the B2B invoices the HSN (B2B) summary.
+Both sides are summed per platform, source file and rate, counting only the rows that reach the reports (B2CS and
+HSN rows without a state or HSN code are left out of the merged views, so they are left out here too). HSN
+summaries have no place of supply, so rate is the finest split both sides share. Sums are kept per merged frame,
+so after a merge only the new file's frames are summed and the report is one group-by over small frames.
+"""
+import numpy as np
+import pandas as pd
+
+from .constants import B2CS_GROUP, HSN_GROUP
+
+# kind -> (check, side its taxable value counts on, columns that must be present for a row to be reported)
+RECON_SIDES = {
+    "b2cs": ("B2CS vs HSN (Sales)", "Taxable Value", B2CS_GROUP),
+    "hsn": ("B2CS vs HSN (Sales)", "HSN Taxable Value", HSN_GROUP),
+    "b2b": ("B2B vs HSN (B2B)", "Taxable Value", []),
+    "hsn_b2b": ("B2B vs HSN (B2B)", "HSN Taxable Value", []),
+}
+RECON_KEY = ['Check', 'Source_Platform', 'Source_File', 'Rate']
+RECON_COLUMNS = RECON_KEY + ['Taxable Value', 'HSN Taxable Value', 'Difference', 'Status']
+# Rupees either way before a difference is flagged; rounding alone keeps per-rate differences to paise.
+DEFAULT_TOLERANCE = 1.0
+
+
+def _rate_column(df):
+    return 'GST Rate' if 'GST Rate' in df.columns else 'Rate'
+
+def _label(df, col):
+    return str(df[col].iloc[0]) if col in df.columns and len(df) else ''
+
+def frame_sums(kind, df):
+    """One merged per-file frame's taxable value by rate, as a part for ``reconcile``."""
+    check, side, required = RECON_SIDES[kind]
+    if 'Taxable Value' not in df.columns or df.empty:
+        return None
+    rows = df[df[required].notna().all(axis=1)] if required else df
+    rates = pd.to_numeric(rows[_rate_column(rows)], errors='coerce').astype(float)
+    sums = pd.to_numeric(rows['Taxable Value'], errors='coerce').groupby(rates).sum()
+    return pd.DataFrame({'Check': check, 'Source_Platform': _label(df, 'Source_Platform'),
+                         'Source_File': _label(df, 'Source_File'), 'Rate': sums.index.to_numpy(), side: sums.to_numpy()})
+
+def reconcile(parts, tolerance=DEFAULT_TOLERANCE):
+    """Both sides of each check per platform, file and rate, from ``frame_sums``-shaped parts; a row is a
+    ``mismatch`` when they differ by more than ``tolerance`` rupees."""
+    parts = [p for p in parts if p is not None and len(p)]
+    if not parts:
+        return pd.DataFrame()
+    both = pd.concat(parts, ignore_index=True)
+    for side in ('Taxable Value', 'HSN Taxable Value'):
+        if side not in both.columns: both[side] = 0.0
+    out = both.groupby(RECON_KEY, as_index=False)[['Taxable Value', 'HSN Taxable Value']].sum().round(2)
+    out['Difference'] = (out['Taxable Value'] - out['HSN Taxable Value']).round(2)
+    out['Status'] = np.where(out['Difference'].abs() > tolerance, 'mismatch', 'ok')
+    return out[RECON_COLUMNS]
+
+def reconciliation_notes(report):
+    """One line per file and check with a mismatch in ``report``."""
+    if report.empty:
+        return []
+    bad = report[report['Status'] == 'mismatch']
+    notes = []
+    for (check, platform, name), rows in bad.groupby(['Check', 'Source_Platform', 'Source_File'], sort=False):
+        rates = ", ".join(f"{rate:g}%: {diff:,.2f}" for rate, diff in zip(rows['Rate'], rows['Difference']))
+        notes.append(f"{name or platform}: {check} differ ({rates}); see the reconciliation report")
+    return notes
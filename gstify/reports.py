@@ -0,0 +1,474 @@
+import numpy as np
+import pandas as pd
+
+from .constants import (B2B_COLUMNS, B2CS_EXPORT_COLUMNS, B2CS_GROUP, ECO_OPERATORS, ECO_PLATFORMS, ECO_TCS_COLUMNS,
+                        HSN_EXPORT_COLUMNS, HSN_EXPORT_NUMERIC, HSN_GROUP, HSN_SUMS)
+from .export import EXPORT_FORMATS, to_bytes, to_zip_bytes
+from .frames import compact_frame, concat_frames, frame_bytes
+from .gst import round_gst_rates
+from .gstr1 import build_gstr1, gstr1_filename
+from .invoices import InvoiceIndex
+from .reconcile import DEFAULT_TOLERANCE, RECON_SIDES, frame_sums, reconcile
+from .profiling import stage
+from .states import normalise_states
+
+
+KINDS = ("b2cs", "hsn", "b2b", "hsn_b2b")
+# Merged views that are State/HSN x Rate totals, as (group columns, summed columns).
+GROUPED_VIEWS = {
+    "b2cs": (B2CS_GROUP, ['Taxable Value']),
+    "hsn": (HSN_GROUP, HSN_SUMS),
+}
+
+def _concat_if_any(lst):
+    return concat_frames(lst) if lst else pd.DataFrame()
+
+def _round_rate_cols(df):
+    for col in ['GST Rate', 'Rate']:
+        if col in df.columns:
+            df[col] = round_gst_rates(df[col])
+    return df
+
+def _map_state_cols(df):
+    for col in ['State', 'Place Of Supply']:
+        if col in df.columns:
+            df[col] = normalise_states(df[col])
+    return df
+
+def _normalise(df):
+    # Row-wise clean-up; applying it per file and then merging gives the same rows as merging first.
+    df = _map_state_cols(df)
+    df = _round_rate_cols(df)
+    if 'HSN' in df.columns:
+        df['HSN'] = df['HSN'].astype(str).fillna('').str.replace(r'\.0$', '', regex=True).str.strip()
+    return df
+
+def _prepared_frames(result):
+    """``[(kind, df)]`` normalised and compacted, unless already ``prepared``."""
+    if result.prepared:
+        return list(result.frames())
+    return [(kind, compact_frame(_normalise(df.copy()))) for kind, df in result.frames()]
+
+def _constant(value, n):
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [value])
+
+def merge_frames(result):
+    """``[(kind, df)]`` as the merged store keeps them: every frame tagged with its file's ``Source_Platform``
+    (B2CS and B2B rows have none of their own; ECO TCS and reconciliation need it) and ``Source_File`` name.
+
+    Tags are added here rather than when preparing, as a cached result may come back under another name.
+    """
+    tags = {'Source_Platform': result.source_platform, 'Source_File': result.name}
+    out = []
+    for kind, df in _prepared_frames(result):
+        extra = {c: _constant(v, len(df)) for c, v in tags.items() if v is not None and c not in df.columns}
+        out.append((kind, df.assign(**extra) if extra else df))
+    return out
+
+def duplicate_note(result, lines):
+    return (f"{result.name}: {lines} B2B invoice line(s) are already in an earlier file; "
+            "see the B2B duplicates report")
+
+def prepare_result(result):
+    """Put ``result``'s frames in merge-ready form in place, so merging it is only an append.
+
+    Done where the file was processed (in a worker process when there is one), which also makes the frames
+    sent back several times smaller: repeated text travels as categoricals.
+    """
+    if not result.prepared:
+        with stage("prepare", sum(len(df) for _, df in result.frames())):
+            for kind, df in _prepared_frames(result):
+                setattr(result, kind, df)
+        result.prepared = True
+    return result
+
+def finish_view(df):
+    """A merged view as shown and exported: numeric gaps as 0, invoice dates as text. Changes ``df`` in place."""
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    if 'Invoice Date' in df.columns:
+        df['Invoice Date'] = df['Invoice Date'].astype(str)
+    return df
+
+def get_compiled_data(data_list, group_cols=None, agg_dict=None):
+    if not data_list:
+        return pd.DataFrame()
+    merged_df = _normalise(_concat_if_any(data_list))
+    if group_cols and agg_dict:
+        merged_df = merged_df.groupby(group_cols, as_index=False, observed=True).agg(agg_dict)
+    return finish_view(merged_df)
+
+# ------------------------------
+# Merged views
+# ------------------------------
+class MergedData:
+    """Per-session store of processed files with the merged views kept up to date incrementally.
+
+    ``add`` folds a file's b2cs/hsn aggregates into running State/HSN x Rate totals and bumps ``version``;
+    ``views`` only rebuilds when the version has moved, so reruns with unchanged data cost nothing.
+    Indexing (``data["hsn"]``) gives the list of normalised per-file frames of one kind, stored compactly
+    (see ``compact_frame``). b2b rows are also indexed by invoice (see ``gstify.invoices``).
+    """
+
+    def __init__(self):
+        self.frames = {kind: [] for kind in KINDS}
+        self.version = 0
+        self._totals = {kind: None for kind in GROUPED_VIEWS}
+        self._views = None
+        self._views_version = -1
+        self._eco = None
+        self._eco_version = -1
+        self._invoices = None
+        self._recon = {kind: [] for kind in RECON_SIDES}   # per kind: frame_sums of the first frames
+
+    @classmethod
+    def restore(cls, frames, totals, version):
+        """Rebuild a store from saved per-file frames and running totals (see ``gstify.sessions``)."""
+        data = cls()
+        data.frames = {kind: list(frames.get(kind, [])) for kind in KINDS}
+        data._totals = {kind: totals.get(kind) for kind in GROUPED_VIEWS}
+        data.version = version
+        return data
+
+    def copy(self):
+        """A copy to add to while this one stays as it is; cheap, as stored frames and totals are never modified."""
+        data = MergedData.restore(self.frames, self._totals, self.version)
+        data._invoices = self._invoices.copy() if self._invoices is not None else None
+        data._recon = {kind: list(parts) for kind, parts in self._recon.items()}
+        return data
+
+    def totals(self):
+        """The running State/HSN x Rate totals, ``{kind: df or None}``."""
+        return dict(self._totals)
+
+    def __getitem__(self, kind):
+        return self.frames[kind]
+
+    def __len__(self):
+        return sum(len(v) for v in self.frames.values())
+
+    def add(self, result):
+        """Merge ``result``'s frames; a note is added to ``result.notes`` if its B2B invoices were already merged."""
+        with stage("merge", sum(len(df) for _, df in result.frames())) as s:
+            self._add(result)
+            s.rows_out = sum(len(dfs[-1]) for dfs in self.frames.values() if dfs)
+
+    def _add(self, result):
+        for kind, part in merge_frames(result):
+            if kind == "b2b":
+                repeated = self.invoices().add(part)
+                if repeated:
+                    result.notes.append(duplicate_note(result, repeated))
+            self.frames[kind].append(part)
+            if kind in GROUPED_VIEWS:
+                group_cols, sum_cols = GROUPED_VIEWS[kind]
+                running = self._totals[kind]
+                part = part[group_cols + sum_cols]
+                merged = part if running is None else concat_frames([running, part])
+                self._totals[kind] = merged.groupby(group_cols, as_index=False, observed=True)[sum_cols].sum()
+        self.version += 1
+
+    def invoices(self):
+        """The ``InvoiceIndex`` of the b2b frames, built on first use for a restored store and then kept up to date."""
+        if self._invoices is None:
+            with stage("invoice_index", sum(len(df) for df in self.frames["b2b"])):
+                self._invoices = InvoiceIndex()
+                for df in self.frames["b2b"]:
+                    self._invoices.add(df)
+        return self._invoices
+
+    def b2b_duplicates(self):
+        """B2B invoice lines found in more than one file (see ``duplicates_report``)."""
+        with stage("b2b_duplicates") as s:
+            out = self.invoices().duplicates(self.frames["b2b"])
+            s.rows_out = len(out)
+        return out
+
+    def b2b_invoices(self, gstin):
+        """Every merged B2B row for recipient ``gstin``."""
+        return finish_view(self.invoices().lookup(self.frames["b2b"], gstin))
+
+    def reconciliation(self, tolerance=DEFAULT_TOLERANCE):
+        """B2CS vs HSN (Sales) and B2B vs HSN (B2B) per platform, file and rate (see ``gstify.reconcile``).
+
+        Only frames added since the last call are summed; stored frames never change.
+        """
+        with stage("reconcile") as s:
+            for kind, parts in self._recon.items():
+                parts.extend(frame_sums(kind, df) for df in self.frames[kind][len(parts):])
+            out = reconcile([p for parts in self._recon.values() for p in parts], tolerance)
+            s.rows_out = len(out)
+        return out
+
+    def eco_totals(self):
+        """``eco_totals`` of the stored frames; like the views, rebuilt only when the data has changed."""
+        if self._eco_version != self.version:
+            with stage("eco_totals") as s:
+                self._eco = eco_totals(self.frames["hsn"], self.frames["hsn_b2b"], self.frames["b2cs"])
+                s.rows_out = sum(len(v) for v in self._eco.values())
+            self._eco_version = self.version
+        return self._eco
+
+    def eco_tcs(self, eco_gstins, by=None):
+        return eco_tcs_report(self.eco_totals(), eco_gstins, by)
+
+    def memory_bytes(self):
+        """Bytes held by this session's frames, running totals and cached views."""
+        frames = [df for dfs in self.frames.values() for df in dfs]
+        frames += [df for df in self._totals.values() if df is not None]
+        frames += list(self._views.values()) if self._views else []
+        frames += list(self._eco.values()) if self._eco else []
+        frames += [p for parts in self._recon.values() for p in parts if p is not None]
+        return sum(frame_bytes(df) for df in frames) + (self._invoices.memory_bytes() if self._invoices else 0)
+
+    def views(self):
+        """The four on-screen merged tables: ``b2cs``, ``hsn``, ``b2b`` and ``hsn_b2b``."""
+        if self._views_version != self.version:
+            with stage("views") as s:
+                self._views = self._build_views()
+                s.rows_out = sum(len(v) for v in self._views.values())
+            self._views_version = self.version
+        return self._views
+
+    def _build_views(self):
+        views = {}
+        for kind in GROUPED_VIEWS:
+            total = self._totals[kind]
+            views[kind] = pd.DataFrame() if total is None else finish_view(total.copy())
+        b2b_df = finish_view(_concat_if_any(self.frames["b2b"]))
+        if not b2b_df.empty:
+            for c in B2B_COLUMNS:
+                if c not in b2b_df.columns: b2b_df[c] = ""
+            b2b_df = b2b_df[B2B_COLUMNS]
+        views["b2b"] = b2b_df
+        views["hsn_b2b"] = finish_view(_concat_if_any(self.frames["hsn_b2b"])).drop(columns=['Source_File'], errors='ignore')
+        return views
+
+def empty_global_data():
+    return MergedData()
+
+def add_result(global_data, result):
+    global_data.add(result)
+
+def merged_views(global_data):
+    return global_data.views()
+
+# ------------------------------
+# Export layouts
+# ------------------------------
+def b2cs_export(b2cs_df):
+    if b2cs_df.empty:
+        return pd.DataFrame()
+    b2cs_out = b2cs_df.rename(columns={'State':'Place Of Supply','GST Rate':'Rate'}).copy()
+    b2cs_out['Type'] = 'OE'; b2cs_out['Applicable % of Tax Rate']=''; b2cs_out['Cess Amount']=0; b2cs_out['E-Commerce GSTIN']=''
+    return b2cs_out[B2CS_EXPORT_COLUMNS]
+
+def _hsn_export_columns(out):
+    if 'Description' not in out.columns: out['Description']=''
+    if 'Cess amount' not in out.columns: out['Cess amount']=0
+    for c in HSN_EXPORT_COLUMNS:
+        if c not in out.columns: out[c] = 0 if c in HSN_EXPORT_NUMERIC else ''
+    return out[HSN_EXPORT_COLUMNS]
+
+def hsn_sales_export(hsn_df):
+    if hsn_df.empty:
+        return pd.DataFrame()
+    out = hsn_df.rename(columns={'GST Rate':'Rate','Quantity':'Total Quantity','Invoice Amount':'Total Value','IGST':'Integrated Tax Amount','CGST':'Central Tax Amount','SGST':'State/UT Tax Amount'}).copy()
+    if 'Description' not in out.columns: out['Description']=''
+    out['UQC']='PCS-PIECES'
+    return _hsn_export_columns(out)
+
+def hsn_b2b_export(hsn_b2b_df):
+    out = hsn_b2b_df.copy()
+    if out.empty:
+        return pd.DataFrame()
+    if 'UQC' not in out.columns: out['UQC']='PCS-PIECES'
+    if 'GST Rate' in out.columns and 'Rate' not in out.columns: out = out.rename(columns={'GST Rate':'Rate'})
+    if 'Quantity' in out.columns and 'Total Quantity' not in out.columns: out = out.rename(columns={'Quantity':'Total Quantity'})
+    if 'Invoice Amount' in out.columns and 'Total Value' not in out.columns: out = out.rename(columns={'Invoice Amount':'Total Value'})
+    if 'Integrated Tax Amount' not in out.columns and 'IGST' in out.columns: out = out.rename(columns={'IGST':'Integrated Tax Amount'})
+    if 'Central Tax Amount' not in out.columns and 'CGST' in out.columns: out = out.rename(columns={'CGST':'Central Tax Amount'})
+    if 'State/UT Tax Amount' not in out.columns and 'SGST' in out.columns: out = out.rename(columns={'SGST':'State/UT Tax Amount'})
+    return _hsn_export_columns(out)
+
+# ECO TCS Report
+ECO_SUMS = ['Taxable Value','IGST','CGST','SGST']
+# hsn_b2b frames use the B2B template's names for the rate and tax columns.
+HSN_B2B_ECO = {'Rate':'GST Rate','Integrated Tax Amount':'IGST','Central Tax Amount':'CGST','State/UT Tax Amount':'SGST'}
+# Optional ECO TCS breakdowns, name -> column. B2CS rows (the only ones with a state) carry taxable value only.
+ECO_BREAKDOWNS = {"rate": "GST Rate", "state": "State"}
+
+def _eco_rows(frames, key, sums, rename=None):
+    """Marketplace rows of ``frames`` as Source_Platform, ``key`` and ``sums`` (missing sum columns count as 0)."""
+    parts = []
+    for df in frames:
+        if rename:
+            df = df.rename(columns=rename)
+        if 'Source_Platform' not in df.columns or key not in df.columns:
+            continue
+        rows = df[df['Source_Platform'].isin(list(ECO_PLATFORMS))]
+        if rows.empty:
+            continue
+        part = pd.DataFrame({'Source_Platform': rows['Source_Platform'].astype(str),
+                             key: pd.to_numeric(rows[key], errors='coerce') if key == 'GST Rate' else rows[key]})
+        for c in sums:
+            part[c] = pd.to_numeric(rows[c], errors='coerce').fillna(0) if c in rows.columns else 0.0
+        parts.append(part)
+    return parts
+
+def eco_group(parts, key, sums):
+    """Per-frame marketplace sums added up by ``Source_Platform`` and ``key``."""
+    if not parts:
+        return pd.DataFrame(columns=['Source_Platform', key] + sums)
+    return concat_frames(parts).groupby(['Source_Platform', key], as_index=False, observed=True, dropna=False)[sums].sum()
+
+def eco_totals(hsn_list, hsn_b2b_list, b2cs_list=()):
+    """Marketplace sums for ECO TCS, one grouped pass each: ``{"rate": Source_Platform x GST Rate -> ECO_SUMS over
+    the HSN rows, "state": Source_Platform x State -> Taxable Value over the B2CS rows}``."""
+    by_rate = _eco_rows(hsn_list, 'GST Rate', ECO_SUMS) + _eco_rows(hsn_b2b_list, 'GST Rate', ECO_SUMS, HSN_B2B_ECO)
+    by_state = _eco_rows(b2cs_list, 'State', ['Taxable Value'])
+    return {"rate": eco_group(by_rate, 'GST Rate', ECO_SUMS), "state": eco_group(by_state, 'State', ['Taxable Value'])}
+
+def build_eco_tcs(hsn_list, hsn_b2b_list, eco_gstins):
+    return eco_tcs_report(eco_totals(hsn_list, hsn_b2b_list), eco_gstins)
+
+def eco_tcs_report(totals, eco_gstins, by=None):
+    """The ECO TCS table from ``eco_totals``: one row per operator with a GSTIN or non-zero supplies, or with
+    ``by="rate"``/``"state"`` one row per operator and rate/place of supply (state rows have no tax columns)."""
+    key = ECO_BREAKDOWNS[by] if by else None
+    sums = totals["state"] if by == "state" else totals["rate"]
+    values = [c for c in ECO_SUMS if c in sums.columns]
+    operators = sums['Source_Platform'].map(ECO_PLATFORMS).rename('E-Commerce Operator Name')
+    grouped = sums[values].groupby([operators] + ([sums[key]] if key else []), observed=True, dropna=False).sum()
+    if key:
+        grouped = grouped[(grouped != 0).any(axis=1)].reset_index()
+        order = {op: i for i, op in enumerate(ECO_OPERATORS)}
+        grouped = grouped.sort_values(key).sort_values('E-Commerce Operator Name', key=lambda s: s.map(order), kind='stable')
+    else:
+        grouped = grouped.reindex(pd.Index(ECO_OPERATORS, name='E-Commerce Operator Name'), fill_value=0.0)
+        has_gstin = pd.Series([bool(eco_gstins.get(op, "")) for op in ECO_OPERATORS], index=grouped.index)
+        grouped = grouped[has_gstin | (grouped != 0).any(axis=1)].reset_index()
+    if grouped.empty:
+        return pd.DataFrame()
+    out = grouped.rename(columns={'Taxable Value': 'Net value of supplies', 'IGST': 'Integrated tax', 'CGST': 'Central tax',
+                                  'SGST': 'State/UT tax', 'GST Rate': 'Rate', 'State': 'Place Of Supply'})
+    out['Nature of Supply'] = 'Liable to collect tax u/s 52(TCS)'
+    out['GSTIN of E-Commerce Operator'] = out['E-Commerce Operator Name'].map(lambda op: eco_gstins.get(op, ""))
+    if 'IGST' in values:
+        out['Cess'] = 0
+    columns = list(ECO_TCS_COLUMNS)
+    if key:
+        columns.insert(columns.index('E-Commerce Operator Name') + 1, 'Rate' if by == "rate" else 'Place Of Supply')
+    return out[[c for c in columns if c in out.columns]].reset_index(drop=True)
+
+# ------------------------------
+# Report set
+# ------------------------------
+# (key, download label, file name base)
+REPORTS = [
+    ("b2cs", "Download Merged B2CS", "B2CS"),
+    ("hsn_sales", "Download Merged HSN (Sales)", "hsn(b2c)"),
+    ("b2b", "Download B2B Output", "B2B_Output"),
+    ("hsn_b2b", "Download HSN (B2B) Output", "hsn(b2b)"),
+    ("eco_tcs", "Download ECO TCS", "ECO_TCS"),
+    ("b2b_duplicates", "Download B2B Duplicates", "B2B_Duplicates"),
+    ("reconciliation", "Download Reconciliation", "Reconciliation"),
+]
+
+# How each report is derived from the merged views (and, for ECO TCS, the cached marketplace sums).
+REPORT_BUILDERS = {
+    "b2cs": lambda data, views, eco_gstins: b2cs_export(views["b2cs"]),
+    "hsn_sales": lambda data, views, eco_gstins: hsn_sales_export(views["hsn"]),
+    "b2b": lambda data, views, eco_gstins: views["b2b"],
+    "hsn_b2b": lambda data, views, eco_gstins: hsn_b2b_export(views["hsn_b2b"]),
+    "eco_tcs": lambda data, views, eco_gstins: data.eco_tcs(eco_gstins),
+    "b2b_duplicates": lambda data, views, eco_gstins: data.b2b_duplicates(),
+    "reconciliation": lambda data, views, eco_gstins: data.reconciliation(),
+}
+
+def b2b_lines(global_data):
+    """Every merged b2b row with its ``Source_Platform``, for ``build_gstr1``."""
+    return _concat_if_any(list(global_data["b2b"]))
+
+def build_report(key, global_data, eco_gstins, views=None):
+    views = views if views is not None else merged_views(global_data)
+    with stage(f"report:{key}") as s:
+        report = REPORT_BUILDERS[key](global_data, views, eco_gstins)
+        s.rows_out = len(report)
+    return report
+
+def build_reports(global_data, eco_gstins, views=None):
+    """The downloadable report frames, keyed as in ``REPORTS``."""
+    views = views if views is not None else merged_views(global_data)
+    return {key: build_report(key, global_data, eco_gstins, views) for key, _, _ in REPORTS}
+
+class ReportCache:
+    """Report frames and file bytes for one session, built on first use.
+
+    Entries belong to one ``global_data`` version (and, for ECO TCS, one set of operator GSTINs) and are
+    dropped as soon as that changes, so a rerun never serialises a file nobody asked for.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._frames = {}
+        self._bytes = {}
+
+    def clear(self):
+        self._version = None
+        self._frames.clear(); self._bytes.clear()
+
+    def memory_bytes(self):
+        return (sum(frame_bytes(df) for _, df in self._frames.values())
+                + sum(len(payload) for _, payload in self._bytes.values()))
+
+    def _token(self, key, global_data, eco_gstins):
+        if self._version != global_data.version:
+            self.clear()
+            self._version = global_data.version
+        return tuple(sorted(eco_gstins.items())) if key == "eco_tcs" else None
+
+    def frame(self, key, global_data, eco_gstins, views=None):
+        token = self._token(key, global_data, eco_gstins)
+        hit = self._frames.get(key)
+        if hit is None or hit[0] != token:
+            hit = self._frames[key] = (token, build_report(key, global_data, eco_gstins, views))
+            for fmt in EXPORT_FORMATS:
+                self._bytes.pop((key, fmt), None)
+        return hit[1]
+
+    def ready(self, key, global_data, eco_gstins, fmt="xlsx"):
+        """Whether the ``fmt`` file for ``key`` is already built for the current data."""
+        token = self._token(key, global_data, eco_gstins)
+        hit = self._bytes.get((key, fmt))
+        return hit is not None and hit[0] == token
+
+    def file_bytes(self, key, global_data, eco_gstins, fmt="xlsx", sheet_name="Sheet1"):
+        token = self._token(key, global_data, eco_gstins)
+        hit = self._bytes.get((key, fmt))
+        if hit is None or hit[0] != token:
+            df = self.frame(key, global_data, eco_gstins)
+            hit = self._bytes[(key, fmt)] = (token, to_bytes(df, fmt, sheet_name=sheet_name))
+        return hit[1]
+
+    def _bundle_token(self, global_data, eco_gstins, formats, gstr1):
+        return self._token("eco_tcs", global_data, eco_gstins), tuple(formats), gstr1
+
+    def bundle_ready(self, global_data, eco_gstins, formats=("xlsx",), gstr1=None):
+        hit = self._bytes.get("bundle")
+        return hit is not None and hit[0] == self._bundle_token(global_data, eco_gstins, formats, gstr1)
+
+    def bundle_bytes(self, global_data, eco_gstins, formats=("xlsx",), gstr1=None):
+        """One ZIP with every report in ``formats``, plus the GSTR-1 JSON when ``gstr1=(gstin, period)``."""
+        token = self._bundle_token(global_data, eco_gstins, formats, gstr1)
+        hit = self._bytes.get("bundle")
+        if hit is None or hit[0] != token:
+            reports = {key: self.frame(key, global_data, eco_gstins) for key, _, _ in REPORTS}
+            documents = None
+            if gstr1:
+                with stage("gstr1"):
+                    documents = {gstr1_filename(*gstr1): build_gstr1(reports, *gstr1, b2b_lines(global_data))}
+            names = {key: base for key, _, base in REPORTS}
+            hit = self._bytes["bundle"] = (token, to_zip_bytes(reports, names, formats, documents))
+        return hit[1]
@@ -0,0 +1,185 @@
+"""Column declarations for every upload format.
+
+Readers use them to project only the columns a platform needs, to read text columns as strings up front and
+to reject a file from its header row before the body is parsed. Date columns carry no dtype hint on purpose:
+Excel serial numbers must stay numeric for ``parse_invoice_dates``.
+"""
+from dataclasses import dataclass
+
+import pandas as pd
+
+NUMERIC = "numeric"
+TEXT = "text"
+DATE = "date"
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str
+    required: bool = True
+    reports: tuple = ()   # which outputs the column feeds: b2cs / hsn / b2b / hsn_b2b
+
+class Schema:
+    def __init__(self, *columns):
+        self.columns = columns
+        self._by_name = {c.name: c for c in columns}
+
+    @property
+    def names(self):
+        return [c.name for c in self.columns]
+
+    @property
+    def required(self):
+        return [c.name for c in self.columns if c.required]
+
+    def missing(self, header):
+        return set(self.required) - set(header)
+
+    def columns_for(self, report):
+        return [c.name for c in self.columns if report in c.reports]
+
+    def usecols(self, name):
+        # A callable rather than a list so optional columns absent from the file don't make pandas raise.
+        return name in self._by_name
+
+    def dtypes(self, header=None):
+        return {c.name: str for c in self.columns if c.kind == TEXT and (header is None or c.name in header)}
+
+    def read_options(self, header=None):
+        return {"usecols": self.usecols, "dtype": self.dtypes(header)}
+
+    def coerce(self, df):
+        """Convert every declared numeric column present in ``df`` in place, bad values becoming 0."""
+        for c in self.columns:
+            if c.kind == NUMERIC and c.name in df.columns:
+                df[c.name] = pd.to_numeric(df[c.name], errors='coerce').fillna(0)
+        return df
+
+B2C = ("b2cs", "hsn")
+
+AMAZON = Schema(
+    Column('Ship To State', TEXT, reports=B2C),
+    Column('Tax Exclusive Gross', NUMERIC, reports=B2C),
+    Column('Cgst Rate', NUMERIC, reports=B2C),
+    Column('Sgst Rate', NUMERIC, reports=B2C),
+    Column('Igst Rate', NUMERIC, reports=B2C),
+    Column('Hsn/sac', TEXT, reports=("hsn",)),
+    Column('Quantity', NUMERIC, reports=("hsn",)),
+    Column('Invoice Amount', NUMERIC, reports=("hsn",)),
+)
+
+FLIPKART_7A = Schema(
+    Column("Aggregate Taxable Value Rs.", NUMERIC, reports=("b2cs",)),
+    Column("CGST %", NUMERIC, reports=("b2cs",)),
+    Column("SGST/UT %", NUMERIC, reports=("b2cs",)),
+)
+
+FLIPKART_7B = Schema(
+    Column("Aggregate Taxable Value Rs.", NUMERIC, reports=("b2cs",)),
+    Column("IGST %", NUMERIC, reports=("b2cs",)),
+    Column("Delivered State (PoS)", TEXT, reports=("b2cs",)),
+)
+
+FLIPKART_12 = Schema(
+    Column("HSN Number", TEXT, reports=("hsn",)),
+    Column("Total Quantity in Nos.", NUMERIC, reports=("hsn",)),
+    Column("Total Taxable Value Rs.", NUMERIC, reports=("hsn",)),
+    Column("IGST Amount Rs.", NUMERIC, reports=("hsn",)),
+    Column("CGST Amount Rs.", NUMERIC, reports=("hsn",)),
+    Column("SGST Amount Rs.", NUMERIC, reports=("hsn",)),
+)
+
+JIOMART = Schema(
+    Column("Customer's Billing State", TEXT, reports=B2C),
+    Column('IGST Rate', NUMERIC, reports=B2C),
+    Column('CGST Rate', NUMERIC, reports=B2C),
+    Column('SGST Rate (or UTGST as applicable)', NUMERIC, reports=B2C),
+    Column('Taxable Value (Final Invoice Amount -Taxes)', NUMERIC, reports=B2C),
+    Column('HSN Code', TEXT, reports=("hsn",)),
+    Column('Item Quantity', NUMERIC, reports=("hsn",)),
+    Column('Final Invoice Amount (Offer Price minus Seller Coupon Amount)', NUMERIC, reports=("hsn",)),
+    Column('IGST Amount', NUMERIC, reports=("hsn",)),
+    Column('CGST Amount', NUMERIC, reports=("hsn",)),
+    Column('SGST Amount (Or UTGST as applicable)', NUMERIC, reports=("hsn",)),
+)
+
+MEESHO = Schema(
+    Column('end_customer_state_new', TEXT, reports=B2C),
+    Column('gst_rate', NUMERIC, reports=B2C),
+    Column('total_taxable_sale_value', NUMERIC, reports=B2C),
+    Column('hsn_code', TEXT, reports=("hsn",)),
+    Column('quantity', NUMERIC, reports=("hsn",)),
+    Column('total_invoice_value', NUMERIC, reports=("hsn",)),
+)
+
+GLOWROAD = Schema(
+    Column('Base amount for GST ', NUMERIC, reports=B2C),
+    Column('Buyer state', TEXT, reports=B2C),
+    Column('GST %', NUMERIC, reports=B2C),
+    Column('Product HSN code', TEXT, reports=("hsn",)),
+    Column('SGST', NUMERIC),
+    Column('UTGST', NUMERIC),
+    Column('CGST', NUMERIC),
+    Column('IGST', NUMERIC),
+    Column('Customer invoice value (GMV)', NUMERIC, reports=("hsn",)),
+)
+
+B2C_OTHER = Schema(
+    Column('Place Of Supply', TEXT, reports=("b2cs",)),
+    Column('Rate', NUMERIC, reports=B2C),
+    Column('Taxable Value', NUMERIC, reports=B2C),
+    Column('Total Value', NUMERIC, reports=("hsn",)),
+    Column('HSN', TEXT, reports=("hsn",)),
+    Column('Total Quantity', NUMERIC, reports=("hsn",)),
+    Column('Integrated Tax Amount', NUMERIC, reports=("hsn",)),
+    Column('Central Tax Amount', NUMERIC, reports=("hsn",)),
+    Column('State/UT Tax Amount', NUMERIC, reports=("hsn",)),
+    Column('Cess Amount', NUMERIC),
+)
+
+B2B = ("b2b", "hsn_b2b")
+
+B2B_TEMPLATE = Schema(
+    Column('GSTIN/UIN of Recipient', TEXT, reports=("b2b",)),
+    Column('Receiver Name', TEXT, reports=("b2b",)),
+    Column('Invoice Number', TEXT, reports=("b2b",)),
+    Column('Invoice Date', DATE, reports=("b2b",)),
+    Column('Invoice Value', NUMERIC, reports=B2B),
+    Column('Place Of Supply', TEXT, reports=B2B),
+    Column('Total Rate', NUMERIC, reports=B2B),
+    Column('Taxable Value', NUMERIC, reports=B2B),
+    Column('Cess Amount', NUMERIC, reports=B2B),
+    Column('HSN', TEXT, reports=("hsn_b2b",)),
+    Column('Total Quantity', NUMERIC, reports=("hsn_b2b",)),
+)
+
+AMAZON_B2B = Schema(
+    Column('Customer Bill To Gstid', TEXT, reports=("b2b",)),
+    Column('Buyer Name', TEXT, reports=("b2b",)),
+    Column('Invoice Number', TEXT, reports=("b2b",)),
+    Column('Invoice Date', DATE, reports=("b2b",)),
+    Column('Invoice Amount', NUMERIC, reports=B2B),
+    Column('Ship To State', TEXT, reports=B2B),
+    Column('Cgst Rate', NUMERIC, reports=B2B),
+    Column('Sgst Rate', NUMERIC, reports=B2B),
+    Column('Utgst Rate', NUMERIC, reports=B2B),
+    Column('Igst Rate', NUMERIC, reports=B2B),
+    Column('Tax Exclusive Gross', NUMERIC, reports=B2B),
+    Column('Compensatory Cess Rate', NUMERIC, reports=B2B),
+    Column('Hsn/sac', TEXT, reports=("hsn_b2b",)),
+    Column('Quantity', NUMERIC, reports=("hsn_b2b",)),
+    # Some exports carry a separate taxable column; when present it drives the tax split.
+    Column('Taxable Value', NUMERIC, required=False, reports=("hsn_b2b",)),
+)
+
+SCHEMAS = {
+    "amazon": AMAZON,
+    "jiomart": JIOMART,
+    "meesho_sales": MEESHO,
+    "meesho_return": MEESHO,
+    "glowroad": GLOWROAD,
+    "b2c_other": B2C_OTHER,
+    "b2b_template": B2B_TEMPLATE,
+    "amazon_b2b": AMAZON_B2B,
+}
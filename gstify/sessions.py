@@ -0,0 +1,233 @@
+"""Per-user session data in a two-tier store: memory for sessions in use, Parquet on disk for the rest.
+
+A session is a ``MergedData`` plus the digests of the files already processed into it, under a random id the
+app keeps in the page URL. Every change is written through to ``<root>/<id>/`` when the app checks the session
+back in; per-file frames never change once added, so only new frames and the small running totals are
+written. Memory is then only a cache: when the sessions held in memory pass ``memory_limit`` the least
+recently used ones that are not checked out are dropped, as are sessions idle for ``idle_seconds``, and a
+later ``checkout`` reads them back. The same happens after a server restart. Sessions on disk expire after
+``disk_ttl_seconds`` and are evicted least-recently-used above ``disk_max_bytes``. Without pyarrow there is no
+disk tier: sessions stay in memory and idle ones are simply forgotten, as Streamlit's own session state would be.
+"""
+import json
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from .adapters import ADAPTERS
+from .cache import parquet_available
+from .readers import log
+from .reports import GROUPED_VIEWS, KINDS, MergedData, ReportCache
+
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+DEFAULT_IDLE_SECONDS = 30 * 60
+DEFAULT_DISK_TTL_SECONDS = 14 * 24 * 3600
+DEFAULT_DISK_MAX_BYTES = 4 * 1024 * 1024 * 1024
+# A checked-out session is kept in memory until it is checked in, or this long if the run never finishes.
+LEASE_SECONDS = 15 * 60
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+def default_session_dir():
+    return os.environ.get("GSTIFY_SESSION_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "gstify-sessions")
+
+@dataclass
+class Session:
+    id: str
+    data: MergedData = field(default_factory=MergedData)
+    processed: dict = field(default_factory=lambda: {key: set() for key in ADAPTERS})   # platform -> digests
+    reports: ReportCache = field(default_factory=ReportCache)
+    saved_version: int = 0
+    saved_counts: dict = field(default_factory=dict)   # kind -> per-file frames already on disk
+    last_used: float = field(default_factory=time.time)
+    lease_until: float = 0.0
+    size: int = 0   # memory_bytes() as of the last checkin
+
+    def memory_bytes(self):
+        return self.data.memory_bytes() + self.reports.memory_bytes()
+
+    @property
+    def dirty(self):
+        return self.data.version != self.saved_version
+
+class SessionStore:
+    def __init__(self, root=None, memory_limit=DEFAULT_MEMORY_LIMIT, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 disk_ttl_seconds=DEFAULT_DISK_TTL_SECONDS, disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.root = root or default_session_dir()
+        self.memory_limit = memory_limit
+        self.idle_seconds = idle_seconds
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.disk_max_bytes = disk_max_bytes
+        self.persistent = parquet_available()
+        if self.persistent:
+            os.makedirs(self.root, exist_ok=True)
+        else:
+            log.warning("pyarrow is not installed; sessions are kept in memory only")
+        self._sessions = {}
+        self._lock = threading.RLock()
+
+    def _dir(self, sid):
+        return os.path.join(self.root, sid)
+
+    # ------------------------------
+    # Checkout / checkin
+    # ------------------------------
+    def checkout(self, sid):
+        """The session ``sid``, from memory, from disk, or new and empty; it stays in memory until ``checkin``."""
+        if not SESSION_ID_PATTERN.match(sid or ""):
+            raise ValueError(f"invalid session id {sid!r}")
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is None:
+                session = self._load(sid) or Session(sid)
+                self._sessions[sid] = session
+            session.last_used = time.time()
+            session.lease_until = session.last_used + LEASE_SECONDS
+            return session
+
+    def checkin(self, session):
+        """Write ``session``'s changes through to disk, release it and drop whatever memory is over the limits."""
+        # Outside the lock: the session is still leased, so nothing else touches it meanwhile.
+        if session.dirty:
+            self._save(session)
+        session.size = session.memory_bytes()
+        with self._lock:
+            if self._sessions.get(session.id) is not session:
+                # Dropped while checked out (its lease ran out); what the run changed still counts.
+                self._sessions[session.id] = session
+            session.last_used = time.time()
+            session.lease_until = 0.0
+            self.evict()
+
+    def reset(self, session):
+        """Empty ``session`` in place and delete its saved copy."""
+        with self._lock:
+            session.data, session.reports = MergedData(), ReportCache()
+            session.processed = {key: set() for key in ADAPTERS}
+            session.saved_version, session.saved_counts = 0, {}
+            if self.persistent:
+                shutil.rmtree(self._dir(session.id), ignore_errors=True)
+
+    # ------------------------------
+    # Eviction
+    # ------------------------------
+    def memory_bytes(self):
+        """Memory held by the sessions in memory, as measured when each was last checked in."""
+        with self._lock:
+            return sum(s.size for s in self._sessions.values())
+
+    def in_memory(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _droppable(self, session, now):
+        # Only sessions that are checked in and safely on disk can leave memory.
+        return session.lease_until < now and not session.dirty and self.persistent
+
+    def evict(self):
+        """Drop idle sessions from memory, then least recently used ones while over ``memory_limit``."""
+        with self._lock:
+            now = time.time()
+            for sid, session in list(self._sessions.items()):
+                idle = session.lease_until < now and now - session.last_used > self.idle_seconds
+                if idle and (self._droppable(session, now) or not self.persistent):
+                    del self._sessions[sid]
+            total = sum(s.size for s in self._sessions.values())
+            for session in sorted(self._sessions.values(), key=lambda s: s.last_used):
+                if total <= self.memory_limit:
+                    break
+                if self._droppable(session, now):
+                    del self._sessions[session.id]
+                    total -= session.size
+            if self.persistent:
+                self._evict_disk(now)
+
+    def _disk_entries(self):
+        out = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            out.append((name, size, os.stat(path).st_mtime))
+        return out
+
+    def _evict_disk(self, now):
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for sid, size, last_used in entries:
+            if sid in self._sessions:
+                continue
+            if total > self.disk_max_bytes or now - last_used > self.disk_ttl_seconds:
+                shutil.rmtree(self._dir(sid), ignore_errors=True)
+                total -= size
+
+    # ------------------------------
+    # Disk tier
+    # ------------------------------
+    def _save(self, session):
+        if not self.persistent:
+            return
+        path = self._dir(session.id)
+        os.makedirs(path, exist_ok=True)
+        data = session.data
+        try:
+            for kind in KINDS:
+                frames = data.frames[kind]
+                for i in range(session.saved_counts.get(kind, 0), len(frames)):
+                    _write_frame(frames[i], os.path.join(path, f"{kind}-{i}.parquet"))
+            for kind, total in data.totals().items():
+                if total is not None:
+                    _write_frame(total, os.path.join(path, f"totals-{kind}.parquet"))
+            meta = {"version": data.version, "counts": {kind: len(data.frames[kind]) for kind in KINDS},
+                    "processed": {key: sorted(digests) for key, digests in session.processed.items()},
+                    "saved": time.time()}
+            _write_meta(meta, path)
+        except Exception as e:
+            # Unwritable frames (or a full disk) leave the session in memory, as it would be without a disk tier.
+            log.warning("session %s: could not be saved (%s); keeping it in memory", session.id, e)
+            return
+        session.saved_version, session.saved_counts = data.version, meta["counts"]
+        os.utime(path)
+
+    def _load(self, sid):
+        if not self.persistent:
+            return None
+        path = self._dir(sid)
+        try:
+            with open(os.path.join(path, "meta.json")) as fh:
+                meta = json.load(fh)
+            frames = {kind: [pd.read_parquet(os.path.join(path, f"{kind}-{i}.parquet")) for i in range(n)]
+                      for kind, n in meta["counts"].items()}
+            totals = {kind: pd.read_parquet(os.path.join(path, f"totals-{kind}.parquet"))
+                      for kind in GROUPED_VIEWS if os.path.exists(os.path.join(path, f"totals-{kind}.parquet"))}
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.isdir(path):
+                log.warning("session %s: saved copy is unreadable (%s); starting afresh", sid, e)
+            return None
+        os.utime(path)
+        processed = {key: set(meta["processed"].get(key, [])) for key in ADAPTERS}
+        return Session(sid, data=MergedData.restore(frames, totals, meta["version"]), processed=processed,
+                       saved_version=meta["version"], saved_counts=meta["counts"])
+
+def _write_frame(df, path):
+    # Write-then-rename so a crash mid-write never leaves a truncated frame behind a valid meta.json.
+    tmp = f"{path}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+def _write_meta(meta, path):
+    fd, tmp = tempfile.mkstemp(prefix=".meta-", dir=path)
+    with os.fdopen(fd, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(path, "meta.json"))
@@ -0,0 +1,320 @@
+"""Merged data kept in an embedded SQL database instead of pandas frames.
+
+``SQLMergedData`` is a drop-in for ``MergedData``: each processed file's normalised frames are appended to one
+table per kind (``b2cs``, ``hsn``, ``b2b``, ``hsn_b2b``) in a database file, and the merged views and the ECO
+TCS sums are computed as queries. Only query results are loaded into memory, so the merge scales with disk
+rather than RAM. DuckDB is used when installed (``pip install duckdb``; it runs queries on all cores), with
+the standard library's SQLite as the fallback. Set ``$GSTIFY_SQL_ENGINE`` to ``duckdb`` or ``sqlite`` to choose.
+
+Views match the pandas path row for row; sums may differ in the last bits because rows are added in another
+order. ``compare_reports`` checks that.
+"""
+import importlib.util
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .constants import B2B_COLUMNS, ECO_PLATFORMS
+from .invoices import INVOICE_KEY, UPPER_KEY_COLUMNS, duplicates_report, invoice_rows
+from .profiling import stage
+from .reconcile import DEFAULT_TOLERANCE, RECON_SIDES, reconcile
+from .reports import (ECO_BREAKDOWNS, ECO_SUMS, GROUPED_VIEWS, HSN_B2B_ECO, KINDS, REPORTS, build_report, duplicate_note,
+                      eco_group, eco_tcs_report, finish_view, merge_frames)
+
+SQL_ENGINES = ("duckdb", "sqlite")
+# Bookkeeping columns giving the file and the row within it, so b2b rows come back in upload order.
+ORDER_COLUMNS = ["_file", "_row"]
+# Distinct b2b invoice keys, and the key columns of the b2b frame being added.
+KEYS_TABLE, NEW_KEYS_TABLE = "b2b_keys", "b2b_new"
+MISSING_RATE = -0.001   # a NULL rate in the keys table; never the result of ROUND(Rate, 2)
+
+
+def available_sql_engines():
+    return [e for e in SQL_ENGINES if e == "sqlite" or importlib.util.find_spec(e) is not None]
+
+def sql_engine():
+    """``$GSTIFY_SQL_ENGINE`` if set and installed, else DuckDB when installed, else SQLite."""
+    available = available_sql_engines()
+    wanted = os.environ.get("GSTIFY_SQL_ENGINE", "").strip().lower()
+    return wanted if wanted in available else available[0]
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _invoice_key_sql(missing_rate=None):
+    # INVOICE_KEY as compared by ``gstify.invoices`` (missing text as ''), as the first four select expressions;
+    # ``missing_rate`` stands in for a NULL rate where the key must be a value (the keys table's primary key).
+    text = [f"COALESCE(UPPER(TRIM({_q(c)})), '')" if c in UPPER_KEY_COLUMNS else f"COALESCE(TRIM({_q(c)}), '')" for c in INVOICE_KEY[:3]]
+    rate = "ROUND(Rate, 2)" if missing_rate is None else f"COALESCE(ROUND(Rate, 2), {missing_rate})"
+    return ", ".join(f"{e} AS {_q(c)}" for e, c in zip(text + [rate], INVOICE_KEY))
+
+def _keys_table_sql():
+    # Every distinct invoice key merged so far; the primary key is the index new files are probed against.
+    cols = ", ".join(f"{_q(c)} {'DOUBLE' if c == 'Rate' else 'TEXT'}" for c in INVOICE_KEY)
+    return f"CREATE TABLE IF NOT EXISTS {KEYS_TABLE} ({cols}, PRIMARY KEY ({', '.join(_q(c) for c in INVOICE_KEY)}))"
+
+def _plain(df):
+    # Databases get plain values: categoricals as their labels, narrow integers widened.
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(object).where(s.notna(), None)
+        elif pd.api.types.is_integer_dtype(s.dtype):
+            s = s.astype(np.int64)
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+class _SQLite:
+    def __init__(self, path):
+        self.con = sqlite3.connect(path, check_same_thread=False)
+
+    def columns(self, table):
+        return [row[1] for row in self.con.execute(f"PRAGMA table_info({_q(table)})")]
+
+    def add_column(self, table, name, numeric):
+        self.con.execute(f"ALTER TABLE {_q(table)} ADD COLUMN {_q(name)} {'REAL' if numeric else 'TEXT'}")
+
+    def append(self, table, df, replace=False):
+        df.to_sql(table, self.con, if_exists="replace" if replace else "append", index=False)
+        self.con.commit()
+
+    def execute(self, sql):
+        self.con.execute(sql)
+        self.con.commit()
+
+    def query(self, sql):
+        return pd.read_sql_query(sql, self.con)
+
+    def close(self):
+        self.con.close()
+
+class _DuckDB:
+    def __init__(self, path):
+        import duckdb
+        self.con = duckdb.connect(path)
+
+    def columns(self, table):
+        rows = self.con.execute("SELECT column_name FROM information_schema.columns WHERE table_name = ? "
+                                "ORDER BY ordinal_position", [table]).fetchall()
+        return [r[0] for r in rows]
+
+    def add_column(self, table, name, numeric):
+        self.con.execute(f"ALTER TABLE {_q(table)} ADD COLUMN {_q(name)} {'DOUBLE' if numeric else 'VARCHAR'}")
+
+    def append(self, table, df, replace=False):
+        self.con.register("_incoming", df)
+        try:
+            if self.columns(table) and not replace:
+                self.con.execute(f"INSERT INTO {_q(table)} BY NAME SELECT * FROM _incoming")
+            else:
+                self.con.execute(f"CREATE OR REPLACE TABLE {_q(table)} AS SELECT * FROM _incoming")
+        finally:
+            self.con.unregister("_incoming")
+
+    def execute(self, sql):
+        self.con.execute(sql)
+
+    def query(self, sql):
+        return self.con.execute(sql).df()
+
+    def close(self):
+        self.con.close()
+
+class SQLMergedData:
+    """``MergedData`` with the per-file frames in an embedded database (see the module docstring).
+
+    ``path`` is the database file; by default a temporary one that ``close`` removes.
+    """
+
+    def __init__(self, path=None, engine=None):
+        self.engine = engine or sql_engine()
+        if self.engine not in available_sql_engines():
+            raise ValueError(f"SQL engine {self.engine!r} is not available; choose from {available_sql_engines()}")
+        self._tmpdir = None
+        if path is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="gstify-sql-")
+            path = os.path.join(self._tmpdir, f"merged.{self.engine}")
+        self.path = path
+        self.db = (_DuckDB if self.engine == "duckdb" else _SQLite)(path)
+        self.version = 0
+        self.files = 0
+        self._tables = {}   # kind -> column names, once the table exists
+        self._views = None
+        self._views_version = -1
+        self._eco = None
+        self._eco_version = -1
+
+    def close(self):
+        self.db.close()
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.files
+
+    def __getitem__(self, kind):
+        """The stored rows of one kind as a one-frame list, like ``MergedData[kind]``."""
+        if kind not in self._tables:
+            return []
+        return [self.db.query(f"SELECT * FROM {_q(kind)} ORDER BY _file, _row").drop(columns=ORDER_COLUMNS)]
+
+    def add(self, result):
+        with stage("merge", sum(len(df) for _, df in result.frames())):
+            for kind, df in merge_frames(result):
+                part = _plain(df)
+                part["_file"], part["_row"] = self.files, np.arange(len(part), dtype=np.int64)
+                known = self._tables.get(kind)
+                if known is not None:
+                    for col in part.columns:
+                        if col not in known:
+                            self.db.add_column(kind, col, pd.api.types.is_numeric_dtype(part[col]))
+                self.db.append(kind, part)
+                self._tables[kind] = self.db.columns(kind)
+                if kind == "b2b":
+                    repeated = self._repeated_lines(part)
+                    if repeated:
+                        result.notes.append(duplicate_note(result, repeated))
+            self.files += 1
+            self.version += 1
+
+    def memory_bytes(self):
+        return 0
+
+    def _repeated_lines(self, part):
+        # Invoice lines of the b2b frame ``part`` already in an earlier file: only its own keys are probed against
+        # the keys table and then inserted, so the cost is per row of the new file.
+        self.db.append(NEW_KEYS_TABLE, part[INVOICE_KEY], replace=True)
+        self.db.execute(_keys_table_sql())
+        keys = ", ".join(_q(c) for c in INVOICE_KEY)
+        # A line without a rate is still a key, as in ``InvoiceIndex``.
+        new = f"SELECT DISTINCT {_invoice_key_sql(MISSING_RATE)} FROM {NEW_KEYS_TABLE}"
+        repeated = int(self.db.query(f"SELECT COUNT(*) AS n FROM ({new}) t JOIN {KEYS_TABLE} USING ({keys})")["n"].iloc[0])
+        self.db.execute(f"INSERT OR IGNORE INTO {KEYS_TABLE} {new}")
+        return repeated
+
+    def b2b_duplicates(self):
+        if "b2b" not in self._tables:
+            return pd.DataFrame()
+        source = "Source_File" if "Source_File" in self._tables["b2b"] else "''"
+        keys = ", ".join(_q(c) for c in INVOICE_KEY)
+        per_file = self.db.query(
+            f"WITH per AS (SELECT {_invoice_key_sql()}, _file, MIN({source}) AS Source_File, COUNT(*) AS Lines, "
+            f'SUM("Taxable Value") AS "Taxable Value", MAX("Invoice Value") AS "Invoice Value" FROM b2b '
+            f"GROUP BY 1, 2, 3, 4, 5) "
+            f"SELECT per.* FROM per JOIN (SELECT {keys} FROM per GROUP BY {keys} HAVING COUNT(*) > 1) dup USING ({keys})")
+        return duplicates_report(per_file)
+
+    def b2b_invoices(self, gstin):
+        if "b2b" not in self._tables:
+            return pd.DataFrame()
+        gstin = _literal(str(gstin).strip().upper())
+        df = self.db.query(f'SELECT * FROM b2b WHERE UPPER(TRIM("GSTIN/UIN of Recipient")) = {gstin} ORDER BY _file, _row')
+        return invoice_rows(finish_view(df.drop(columns=ORDER_COLUMNS))) if len(df) else pd.DataFrame()
+
+    def _grouped(self, kind):
+        group_cols, sum_cols = GROUPED_VIEWS[kind]
+        keys = ", ".join(_q(c) for c in group_cols)
+        sums = ", ".join(f"COALESCE(SUM({_q(c)}), 0) AS {_q(c)}" for c in sum_cols)
+        present = " AND ".join(f"{_q(c)} IS NOT NULL" for c in group_cols)
+        return self.db.query(f"SELECT {keys}, {sums} FROM {_q(kind)} WHERE {present} GROUP BY {keys} ORDER BY {keys}")
+
+    def _build_views(self):
+        views = {}
+        for kind in GROUPED_VIEWS:
+            views[kind] = finish_view(self._grouped(kind)) if kind in self._tables else pd.DataFrame()
+        b2b_df, hsn_b2b_df = (finish_view(self[kind][0]) if kind in self._tables else pd.DataFrame()
+                              for kind in ("b2b", "hsn_b2b"))
+        if not b2b_df.empty:
+            for c in B2B_COLUMNS:
+                if c not in b2b_df.columns: b2b_df[c] = ""
+            b2b_df = b2b_df[B2B_COLUMNS]
+        views["b2b"], views["hsn_b2b"] = b2b_df, hsn_b2b_df.drop(columns=['Source_File'], errors='ignore')
+        return views
+
+    def views(self):
+        if self._views_version != self.version:
+            with stage("views") as s:
+                self._views = self._build_views()
+                s.rows_out = sum(len(v) for v in self._views.values())
+            self._views_version = self.version
+        return self._views
+
+    def _eco_sums(self, kind, key, sums, rename=None):
+        """Marketplace sums of one table by Source_Platform and ``key``, as a list of at most one frame."""
+        rename = rename or {}
+        source = {rename.get(c, c): c for c in self._tables.get(kind, [])}
+        if "Source_Platform" not in source or key not in source:
+            return []
+        platforms = ", ".join(_literal(p) for p in ECO_PLATFORMS)
+        cols = ", ".join(f"COALESCE(SUM({_q(source[c])}), 0) AS {_q(c)}" if c in source else f"0.0 AS {_q(c)}"
+                         for c in sums)
+        df = self.db.query(f"SELECT Source_Platform, {_q(source[key])} AS {_q(key)}, {cols} FROM {_q(kind)} "
+                           f"WHERE Source_Platform IN ({platforms}) GROUP BY 1, 2")
+        return [df] if len(df) else []
+
+    def eco_totals(self):
+        if self._eco_version != self.version:
+            with stage("eco_totals") as s:
+                by_rate = self._eco_sums("hsn", "GST Rate", ECO_SUMS) + self._eco_sums("hsn_b2b", "GST Rate", ECO_SUMS, HSN_B2B_ECO)
+                self._eco = {"rate": eco_group(by_rate, "GST Rate", ECO_SUMS),
+                             "state": eco_group(self._eco_sums("b2cs", "State", ["Taxable Value"]), "State", ["Taxable Value"])}
+                s.rows_out = sum(len(v) for v in self._eco.values())
+            self._eco_version = self.version
+        return self._eco
+
+    def eco_tcs(self, eco_gstins, by=None):
+        return eco_tcs_report(self.eco_totals(), eco_gstins, by)
+
+    def reconciliation(self, tolerance=DEFAULT_TOLERANCE):
+        parts = []
+        with stage("reconcile") as s:
+            for kind, (check, side, required) in RECON_SIDES.items():
+                columns = self._tables.get(kind, [])
+                rate = "GST Rate" if "GST Rate" in columns else "Rate"
+                if "Taxable Value" not in columns or rate not in columns:
+                    continue
+                tags = ", ".join(f"COALESCE(CAST({_q(c)} AS TEXT), '') AS {_q(c)}" if c in columns else f"'' AS {_q(c)}"
+                                 for c in ("Source_Platform", "Source_File"))
+                present = " AND ".join(f"{_q(c)} IS NOT NULL" for c in list(required) + [rate])
+                part = self.db.query(f'SELECT {tags}, CAST({_q(rate)} AS DOUBLE) AS Rate, SUM("Taxable Value") AS {_q(side)} '
+                                     f"FROM {_q(kind)} WHERE {present} GROUP BY 1, 2, 3")
+                part.insert(0, "Check", check)
+                parts.append(part)
+            out = reconcile(parts, tolerance)
+            s.rows_out = len(out)
+        return out
+
+def compare_reports(a, b, eco_gstins, rtol=1e-9):
+    """Keys of the reports (plus merged views and ECO TCS breakdowns) that differ between two merged stores.
+
+    Values are compared as plain objects (categoricals by label) with a relative tolerance for float sums.
+    """
+    def plain(df):
+        return _plain(df).reset_index(drop=True)
+
+    differing = []
+    views_a, views_b = a.views(), b.views()
+    pairs = [(f"view:{kind}", views_a[kind], views_b[kind]) for kind in KINDS]
+    pairs += [(key, build_report(key, a, eco_gstins, views_a), build_report(key, b, eco_gstins, views_b))
+              for key, _, _ in REPORTS]
+    pairs += [(f"eco_tcs:{by}", a.eco_tcs(eco_gstins, by), b.eco_tcs(eco_gstins, by)) for by in ECO_BREAKDOWNS]
+    for key, x, y in pairs:
+        try:
+            pd.testing.assert_frame_equal(plain(x), plain(y), check_dtype=False, rtol=rtol)
+        except AssertionError:
+            differing.append(key)
+    return differing
@@ -0,0 +1,60 @@
+"""State name normalisation.
+
+Every spelling we know of (``STATE_NAME_MAPPING`` keys, ``STATE_ALIASES``, the coded ``"23-Madhya Pradesh"``
+form and its bare name) is indexed once at import under a loose key: case-folded, ``&`` read as ``and`` and
+whitespace collapsed. A column is normalised by resolving each distinct value once and broadcasting the result
+back to the rows as a categorical of state codes.
+"""
+import numpy as np
+import pandas as pd
+
+from .constants import STATE_ALIASES, STATE_NAME_MAPPING
+from .profiling import profiled
+
+UNMAPPED_PREFIX = "Unmapped: "
+STATE_CODES = sorted(set(STATE_NAME_MAPPING.values()))
+
+
+def _loose(name):
+    return " ".join(name.casefold().replace("&", " and ").split())
+
+def _build_index():
+    index = {}
+    for code in STATE_CODES:
+        index[_loose(code)] = code
+        index[_loose(code.split("-", 1)[1])] = code
+    for name, code in {**STATE_NAME_MAPPING, **STATE_ALIASES}.items():
+        index[_loose(name)] = code
+    return index
+
+STATE_INDEX = _build_index()
+
+def state_code(name):
+    """The coded form (``"23-Madhya Pradesh"``) of one state name, or ``""`` when it is not recognised."""
+    return STATE_INDEX.get(_loose(str(name)), "")
+
+def _label(value):
+    if value.startswith(UNMAPPED_PREFIX):
+        return value
+    return STATE_INDEX.get(_loose(value)) or UNMAPPED_PREFIX + value.strip().title()
+
+@profiled("normalise_states")
+def normalise_states(values):
+    """State codes for a column of state names, as a categorical; unknown names become ``"Unmapped: <Name>"``."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), list(values.cat.categories.astype(str))
+        if (codes < 0).any():
+            codes, uniques = np.where(codes < 0, len(uniques), codes), uniques + ["nan"]
+    else:
+        codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=False)
+    labels = [_label(u) for u in uniques]
+    categories = sorted(set(labels))
+    position = {label: i for i, label in enumerate(categories)}
+    remap = np.array([position[label] for label in labels], dtype=np.int32)
+    return pd.Series(pd.Categorical.from_codes(remap[codes], categories), index=values.index, name=values.name)
+
+def unmapped_states(states):
+    """Boolean mask of the rows of a normalised state column that did not resolve to a known state."""
+    states = states if isinstance(states.dtype, pd.CategoricalDtype) else states.astype("category")
+    flags = np.asarray(states.cat.categories.astype(str).str.startswith(UNMAPPED_PREFIX))
+    return flags[states.cat.codes.to_numpy()]
@@ -0,0 +1,34 @@
+"""Chunked CSV reads folded into running aggregates against reading the whole file at once."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import write_upload
+from gstify import ADAPTERS
+from gstify.adapters import FOLD_KEYS
+
+CSV_PLATFORMS = [key for key in ADAPTERS if key != "flipkart"]
+
+
+def _totals(df, keys):
+    # Both reads as the merged views see them: rows summed per key, rows without one left out.
+    df = df.assign(**{k: df[k].astype(object) for k in keys})
+    return df.groupby(keys, observed=True).sum(numeric_only=True).sort_index()
+
+@pytest.mark.parametrize("platform", CSV_PLATFORMS)
+def test_chunked_csv_matches_whole_file(tmp_path, platform):
+    path = str(write_upload(platform, 3000, tmp_path, "csv", seed=3))
+    whole = ADAPTERS[platform].process(path, "Madhya Pradesh")
+    chunked = ADAPTERS[platform].process(path, "Madhya Pradesh", chunksize=700)
+    assert chunked.reader == "csv-chunked"
+    whole_frames, chunked_frames = dict(whole.frames()), dict(chunked.frames())
+    assert whole_frames and whole_frames.keys() == chunked_frames.keys()
+    for kind, df in whole_frames.items():
+        if kind == "b2b":
+            pd.testing.assert_frame_equal(chunked_frames[kind].reset_index(drop=True), df.reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False)
+            continue
+        expected, got = _totals(df, FOLD_KEYS[kind]), _totals(chunked_frames[kind], FOLD_KEYS[kind])
+        assert list(got.index) == list(expected.index), kind
+        np.testing.assert_allclose(got[expected.columns].to_numpy(float), expected.to_numpy(float), rtol=1e-9, err_msg=kind)
+    assert chunked.off_slab == whole.off_slab
@@ -0,0 +1,94 @@
+"""The vectorised tax split and date parsing against the row-by-row versions they replaced."""
+import numpy as np
+import pandas as pd
+
+from gstify.constants import STATE_NAME_MAPPING
+from gstify.gst import calculate_gst_amounts, parse_invoice_dates, split_gst
+from gstify.states import state_code
+
+
+# ------------------------------
+# The apply-based versions from app.py, with the business state passed in instead of read from the session
+# ------------------------------
+def old_calculate_gst_amounts(df, taxable_value_col, gst_rate_col, state_col_for_igst_cgst_sgst=None, user_state=None):
+    df[taxable_value_col] = pd.to_numeric(df[taxable_value_col], errors='coerce').fillna(0)
+    df[gst_rate_col] = pd.to_numeric(df[gst_rate_col], errors='coerce').fillna(0)
+
+    df['calculated_tax'] = df[taxable_value_col] * (df[gst_rate_col] / 100)
+    df['calculated_tax'] = df['calculated_tax'].fillna(0)
+
+    if state_col_for_igst_cgst_sgst and user_state:
+        df[state_col_for_igst_cgst_sgst] = df[state_col_for_igst_cgst_sgst].astype(str).str.strip().str.title()
+        df['Mapped_State_For_GST_Calc'] = df[state_col_for_igst_cgst_sgst].replace(STATE_NAME_MAPPING)
+        df['is_intra_state'] = df['Mapped_State_For_GST_Calc'].apply(lambda x: pd.notna(x) and x.upper() == user_state.upper())
+        df['IGST'] = df.apply(lambda row: row['calculated_tax'] if not row['is_intra_state'] else 0, axis=1)
+        df['CGST'] = df.apply(lambda row: row['calculated_tax'] / 2 if row['is_intra_state'] else 0, axis=1)
+        df['SGST'] = df['CGST']
+        df = df.drop(columns=['Mapped_State_For_GST_Calc','is_intra_state'])
+    else:
+        df['IGST'] = df['calculated_tax']
+        df['CGST'] = 0
+        df['SGST'] = 0
+
+    df['IGST'] = pd.to_numeric(df['IGST'], errors='coerce').fillna(0)
+    df['CGST'] = pd.to_numeric(df['CGST'], errors='coerce').fillna(0)
+    df['SGST'] = pd.to_numeric(df['SGST'], errors='coerce').fillna(0)
+    return df.drop(columns=['calculated_tax'])
+
+def old_format_invoice_date(val):
+    try:
+        if isinstance(val, (int, float)):
+            return pd.to_datetime(val, unit='D', origin=pd.Timestamp('1899-12-30')).strftime('%d-%b-%Y')
+        return pd.to_datetime(val).strftime('%d-%b-%Y')
+    except Exception:
+        return pd.NA
+
+
+# ------------------------------
+# Mixed-type columns as they come out of the uploads
+# ------------------------------
+# Spellings the old code recognised (it only stripped and title-cased); ``normalise_states`` accepts more.
+STATES = [' madhya pradesh ', 'MADHYA PRADESH', 'Madhya Pradesh', 'maharashtra', ' Tamil Nadu', 'KARNATAKA ',
+          '23-Madhya Pradesh', 'Atlantis', '', np.nan, None]
+TAXABLE = [100, 250.5, '99.99', ' 10 ', 'abc', None, np.nan, -40, '1e3', 0]
+RATES = [18, '12', 5.0, 'x', None, np.nan, 28, '0.1', 3, ' 18 ']
+DATES = [45000, 45123.0, 44927.75, '01-Apr-2024', '2024-04-01', '2024-04-01 10:30:00', '5 Apr 2024', '04/05/2024',
+         '04-05-2024', 'April 5, 2024', ' 01-Apr-2024', '2024/04/01', 'bad', '', None, np.nan,
+         pd.Timestamp('2024-03-31'), 45000]
+
+def _mixed(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    pick = lambda values: [values[i] for i in rng.integers(0, len(values), n)]
+    return pd.DataFrame({'Taxable': pick(TAXABLE), 'Rate': pick(RATES), 'State': pick(STATES)}, dtype=object)
+
+
+def test_calculate_gst_amounts_matches_apply_version():
+    df = _mixed()
+    for business_state in ['Madhya Pradesh', 'Maharashtra']:
+        expected = old_calculate_gst_amounts(df.copy(), 'Taxable', 'Rate', 'State', STATE_NAME_MAPPING[business_state])
+        got = calculate_gst_amounts(df.copy(), 'Taxable', 'Rate', 'State', state_code(business_state))
+        for col in ['Taxable', 'Rate', 'IGST', 'CGST', 'SGST']:
+            np.testing.assert_allclose(got[col].to_numpy(float), expected[col].to_numpy(float), err_msg=col)
+        assert (got['CGST'] > 0).any() and (got['IGST'] > 0).any()
+
+def test_split_gst_without_state_is_all_igst():
+    df = _mixed()
+    expected = old_calculate_gst_amounts(df.copy(), 'Taxable', 'Rate')
+    taxable, rate, igst, cgst, sgst = split_gst(df['Taxable'], df['Rate'])
+    np.testing.assert_allclose(taxable.to_numpy(float), expected['Taxable'].to_numpy(float))
+    np.testing.assert_allclose(rate.to_numpy(float), expected['Rate'].to_numpy(float))
+    np.testing.assert_allclose(igst.to_numpy(float), expected['IGST'].to_numpy(float))
+    assert (cgst == 0).all() and (sgst == 0).all()
+
+def test_parse_invoice_dates_matches_apply_version():
+    values = pd.Series(DATES * 3, dtype=object)
+    dates, unparsed = parse_invoice_dates(values)
+    expected = values.apply(old_format_invoice_date)
+    assert dates.isna().tolist() == expected.isna().tolist()
+    assert dates[expected.notna()].tolist() == expected[expected.notna()].tolist()
+    assert unparsed.tolist() == expected.isna().tolist()
+
+def test_parse_invoice_dates_on_datetime_column():
+    values = pd.Series(pd.to_datetime(['2024-04-01', None, '2023-12-31']))
+    dates, unparsed = parse_invoice_dates(values)
+    assert dates.tolist()[::2] == ['01-Apr-2024', '31-Dec-2023'] and unparsed.tolist() == [False, True, False]
@@ -0,0 +1,62 @@
+"""The GSTR-1 B2B table."""
+import pandas as pd
+import pytest
+
+from gstify.gstr1 import build_gstr1
+
+GSTIN = "23ABCDE1234F1Z5"
+
+
+def _lines(lines, platform):
+    return pd.DataFrame(lines, columns=["Invoice Number", "Invoice Value", "Rate", "Taxable Value"]).assign(**{
+        "GSTIN/UIN of Recipient": "27ABCDE0001F1Z1", "Invoice Date": "01-Apr-2024",
+        "Place Of Supply": "27-Maharashtra", "Reverse Charge": "N", "Cess Amount": 0.0, "Source_Platform": platform})
+
+def _build(b2b_lines):
+    empty = pd.DataFrame()
+    reports = {"b2b": empty, "b2cs": empty, "hsn_b2b": empty, "hsn_sales": empty, "eco_tcs": empty}
+    return build_gstr1(reports, GSTIN, "042024", b2b_lines)
+
+def _values(lines, platform):
+    doc = _build(_lines(lines, platform))
+    return {inv["inum"]: inv["val"] for entry in doc["b2b"] for inv in entry["inv"]}
+
+def test_template_invoice_total_is_taken_once():
+    # The total (1000 at 18% + 500 at 5%) on both of the invoice's rate lines; a blank copy does not count.
+    assert _values([("T1", 1705.0, 18, 1000.0), ("T1", 1705.0, 5, 500.0)], "B2B_Template") == {"T1": 1705.0}
+    assert _values([("T2", None, 18, 1000.0), ("T2", 1705.0, 5, 500.0)], "B2B_Template") == {"T2": 1705.0}
+
+def test_amazon_b2b_line_amounts_are_added_up():
+    # Identical small items, each line carrying its own amount.
+    lines = [("A1", 1.18, 18, 1.0), ("A1", 1.18, 18, 1.0), ("A2", 52.5, 5, 50.0), ("A3", 118.0, 18, 100.0),
+             ("A3", 105.0, 5, 100.0)]
+    assert _values(lines, "Amazon_B2B") == {"A1": 2.36, "A2": 52.5, "A3": 223.0}
+
+def test_b2b_table_matches_a_hand_worked_return():
+    columns = ["GSTIN/UIN of Recipient", "Invoice Number", "Invoice Date", "Invoice Value", "Place Of Supply",
+               "Reverse Charge", "Rate", "Taxable Value", "Cess Amount", "Source_Platform"]
+    lines = pd.DataFrame([
+        ("29BBBBB0002B1Z2", "B1", "02-Apr-2024", 590.0, "29-Karnataka", "Y", 18.0, 500.0, 0.0, "B2B_Template"),
+        ("23AAAAA0001A1Z1", "A1", "01-Apr-2024", 1272.0, "23-Madhya Pradesh", "N", 18.0, 500.0, 0.0, "B2B_Template"),
+        ("23AAAAA0001A1Z1", "A1", "01-Apr-2024", 1272.0, "23-Madhya Pradesh", "N", 5.0, 200.0, 0.0, "B2B_Template"),
+        ("23AAAAA0001A1Z1", "A1", "01-Apr-2024", 1272.0, "23-Madhya Pradesh", "N", 18.0, 400.0, 0.0, "B2B_Template"),
+    ], columns=columns)
+
+    def item(num, rt, txval, iamt, camt):
+        return {"num": num, "itm_det": {"rt": rt, "txval": txval, "iamt": iamt, "camt": camt, "samt": camt,
+                                        "csamt": 0.0}}
+
+    assert _build(lines) == {"gstin": GSTIN, "fp": "042024", "b2b": [
+        {"ctin": "23AAAAA0001A1Z1", "inv": [
+            {"inum": "A1", "idt": "01-04-2024", "val": 1272.0, "pos": "23", "rchrg": "N", "inv_typ": "R",
+             "itms": [item(1, 5, 200.0, 0.0, 5.0), item(2, 18, 900.0, 0.0, 81.0)]}]},
+        {"ctin": "29BBBBB0002B1Z2", "inv": [
+            {"inum": "B1", "idt": "02-04-2024", "val": 590.0, "pos": "29", "rchrg": "Y", "inv_typ": "R",
+             "itms": [item(1, 18, 500.0, 90.0, 0.0)]}]},
+    ]}
+
+def test_unmapped_place_of_supply_is_refused():
+    lines = _lines([("U1", 118.0, 18, 100.0)], "B2B_Template")
+    assert _build(lines.assign(**{"Place Of Supply": "Maharashtra"}))["b2b"][0]["inv"][0]["pos"] == "27"
+    with pytest.raises(ValueError, match="unmapped place of supply in b2b: Atlantis"):
+        _build(lines.assign(**{"Place Of Supply": "Atlantis"}))
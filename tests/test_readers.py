@@ -0,0 +1,18 @@
+"""Streamed Excel headers against pandas' own."""
+import openpyxl
+import pandas as pd
+
+from gstify.readers import read_header
+
+
+def test_read_header_names_columns_like_pandas(tmp_path):
+    wb = openpyxl.Workbook()
+    wb.active.append(['A', None, 'B', 'A', 2023, 'A.1', 'A', 'Rate', 2.5])
+    wb.active.append([1, 2, 3, 4, 5, 6, 7, 8, 9])
+    wb.create_sheet('Other').append(['Not this one'])
+    path = tmp_path / "upload.xlsx"
+    wb.save(path)
+    assert read_header(str(path)) == list(pd.read_excel(path, nrows=0).columns)
+    with open(path, 'rb') as f:
+        assert read_header(f, 'upload.xlsx') == list(pd.read_excel(path, nrows=0).columns)
+        assert f.tell() == 0
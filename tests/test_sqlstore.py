@@ -0,0 +1,50 @@
+"""The SQL-backed merge against the pandas one, on the same generated uploads."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import write_upload
+from gstify import ADAPTERS, empty_global_data
+from gstify.adapters import FileResult
+from gstify.constants import B2B_COLUMNS
+from gstify.reports import duplicate_note
+from gstify.sqlstore import SQLMergedData, available_sql_engines, compare_reports
+
+ECO_GSTINS = {'Amazon': '23AAICA3918J1CV', 'Flipkart': '', 'Jiomart': '', 'Meesho': '23AACCF6368D1CY', 'Glowroad': ''}
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    out = tmp_path_factory.mktemp("uploads")
+    paths = [write_upload(platform, 400, out, "csv", seed) for platform in ADAPTERS for seed in (0, 1)]
+    # The same B2B file twice, so the duplicates report has rows to compare.
+    paths.append(write_upload("b2b_template", 400, out, "csv", 0))
+    return [ADAPTERS[p.rsplit("/", 1)[-1].rsplit("_", 2)[0]].process(p, "Madhya Pradesh") for p in map(str, paths)]
+
+@pytest.mark.parametrize("engine", available_sql_engines())
+def test_sql_store_matches_pandas(results, engine):
+    pandas_data = empty_global_data()
+    with SQLMergedData(engine=engine) as sql_data:
+        for result in results:
+            pandas_data.add(result)
+            sql_data.add(result)
+        assert not pandas_data.b2b_duplicates().empty
+        assert compare_reports(pandas_data, sql_data, ECO_GSTINS) == []
+
+@pytest.mark.parametrize("engine", available_sql_engines())
+def test_lines_without_a_rate_count_as_repeated(engine):
+    # One invoice line with a rate and two without, uploaded twice: every line is a repeat, as in the pandas index.
+    # Preparing a result fills a missing rate with 0, so the frames are passed as already prepared to keep the NaN.
+    def upload(name):
+        b2b = pd.DataFrame({c: "" for c in B2B_COLUMNS}, index=range(3)).assign(**{
+            "GSTIN/UIN of Recipient": "27ABCDE0001F1Z1", "Invoice Number": ["I1", "I1", "I2"],
+            "Invoice Date": "01-Apr-2024", "Rate": [18.0, np.nan, np.nan], "Taxable Value": 100.0,
+            "Invoice Value": 300.0, "Place Of Supply": "27-Maharashtra", "Cess Amount": 0.0})
+        return FileResult(name, b2b=b2b, prepared=True)
+    pandas_data = empty_global_data()
+    with SQLMergedData(engine=engine) as sql_data:
+        for data in (pandas_data, sql_data):
+            first, second = upload("a.csv"), upload("b.csv")
+            data.add(first); data.add(second)
+            assert first.notes == [] and second.notes == [duplicate_note(second, 3)]
+        assert compare_reports(pandas_data, sql_data, ECO_GSTINS) == []